@@ -0,0 +1,63 @@
+import os
+import tarfile
+import zipfile
+
+
+class ArchiveSource():
+
+    archiveSuffixList = ['.zip', '.tar', '.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2']
+
+    def __init__(self, archivePath):
+        self.archivePath = archivePath
+
+
+    @classmethod
+    def isArchive(cls, path):
+        return os.path.isfile(path) and cls.archiveSuffix(path) is not None
+
+
+    @classmethod
+    def archiveSuffix(cls, path):
+        for suffix in sorted(cls.archiveSuffixList, key=len, reverse=True):
+            if path.endswith(suffix):
+                return suffix
+        return None
+
+
+    def personName(self):
+        name = self.archivePath.rstrip('/').split('/')[-1]
+        return name[:-len(self.archiveSuffix(name))]
+
+
+    def memberPath(self, memberName):
+        return self.archivePath + '/' + memberName
+
+
+    # zip members are read in local header order, so the archive is read front to back
+    def iterZipJavaFile(self, memberFilter=None):
+        with zipfile.ZipFile(self.archivePath) as zp:
+            memberList = [info for info in zp.infolist()
+                          if not info.is_dir() and info.filename.endswith('.java')
+                          and (memberFilter is None or not memberFilter(info.filename, info.file_size))]
+            memberList.sort(key=lambda info: info.header_offset)
+            for info in memberList:
+                yield self.memberPath(info.filename), zp.read(info)
+
+
+    # tar members are read in stream mode, compressed tars are never seeked backwards
+    def iterTarJavaFile(self, memberFilter=None):
+        with tarfile.open(self.archivePath, 'r|*') as tp:
+            for member in tp:
+                if not member.isfile() or not member.name.endswith('.java'):
+                    continue
+                if memberFilter is not None and memberFilter(member.name, member.size):
+                    continue
+                yield self.memberPath(member.name), tp.extractfile(member).read()
+
+
+    # yield (path, data) for every .java member
+    # memberFilter(memberName, byteSize) : True for the members to skip, they are never read
+    def iterJavaFile(self, memberFilter=None):
+        if self.archiveSuffix(self.archivePath) == '.zip':
+            return self.iterZipJavaFile(memberFilter)
+        return self.iterTarJavaFile(memberFilter)
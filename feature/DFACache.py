@@ -0,0 +1,139 @@
+import os
+import sys
+import pickle
+import logging
+import threading
+
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.PredictionContext import PredictionContext
+
+from .FileParser import FileParser
+from .SqliteCache import cacheFingerprint
+from .grammer import JavaLexer
+from .grammer import JavaParser
+
+
+# ATN states and runtime singletons are saved by reference, identity checks in the
+# ATN simulators must see the live objects again after loading
+class DFAPickler(pickle.Pickler):
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ATNState):
+            if obj.atn is JavaLexer.atn:
+                return ('LexerState', obj.stateNumber)
+            return ('ParserState', obj.stateNumber)
+        if obj is PredictionContext.EMPTY:
+            return ('EmptyContext',)
+        if obj is SemanticContext.NONE:
+            return ('NoneSemanticContext',)
+        return None
+
+
+class DFAUnpickler(pickle.Unpickler):
+
+    def persistent_load(self, persistentId):
+        if persistentId[0] == 'LexerState':
+            return JavaLexer.atn.states[persistentId[1]]
+        if persistentId[0] == 'ParserState':
+            return JavaParser.atn.states[persistentId[1]]
+        if persistentId[0] == 'EmptyContext':
+            return PredictionContext.EMPTY
+        if persistentId[0] == 'NoneSemanticContext':
+            return SemanticContext.NONE
+        raise pickle.UnpicklingError('unknown persistent id {persistentId}'.format(persistentId=persistentId))
+
+
+# The DFA of JavaLexer and JavaParser is class level state filled by ATN simulation.
+# It can be warmed up by parsing a corpus (workers forked afterwards inherit it)
+# and saved to / restored from disk so short runs start hot.
+class DFACache():
+
+    version = 1
+    # the DFA graph is pickled recursively
+    recursionLimit = 1000000
+    stackSize = 512 * 1024 * 1024
+
+    def __init__(self, cachePath=None):
+        self.cachePath = cachePath
+
+
+    def fingerprint(self):
+        return cacheFingerprint(('.grammer.JavaLexer', '.grammer.JavaParser'), extraList=(sys.version,))
+
+
+    def runWithLargeStack(self, function):
+        result = []
+        error = []
+
+        def target():
+            try:
+                result.append(function())
+            except BaseException as e:
+                error.append(e)
+
+        previousStackSize = threading.stack_size(self.stackSize)
+        previousRecursionLimit = sys.getrecursionlimit()
+        sys.setrecursionlimit(self.recursionLimit)
+        try:
+            thread = threading.Thread(target=target)
+            thread.start()
+            thread.join()
+        finally:
+            threading.stack_size(previousStackSize)
+            sys.setrecursionlimit(previousRecursionLimit)
+
+        if error:
+            raise error[0]
+        return result[0]
+
+
+    def warmUp(self, filePathList, fileParserOption=None):
+        warmedNumber = 0
+        fileParser = FileParser(**(fileParserOption or dict()))
+        for filePath in filePathList:
+            try:
+                fileParser.parseFile(filePath)
+                warmedNumber += 1
+            except Exception as e:
+                logging.warning('warm up failed on {filePath}: {error}'.format(filePath=filePath, error=e))
+        return warmedNumber
+
+
+    def dump(self):
+        with open(self.cachePath + '.tmp', 'wb') as fp:
+            pickle.dump({'version': self.version, 'fingerprint': self.fingerprint()}, fp)
+            DFAPickler(fp, protocol=pickle.HIGHEST_PROTOCOL).dump(
+                (JavaLexer.decisionsToDFA, JavaParser.decisionsToDFA, JavaParser.sharedContextCache.cache)
+            )
+        os.replace(self.cachePath + '.tmp', self.cachePath)
+        return True
+
+
+    def save(self):
+        return self.runWithLargeStack(self.dump)
+
+
+    def restore(self):
+        with open(self.cachePath, 'rb') as fp:
+            header = pickle.load(fp)
+            if header.get('version') != self.version or header.get('fingerprint') != self.fingerprint():
+                return False
+            lexerDFA, parserDFA, parserContextCache = DFAUnpickler(fp).load()
+
+        # simulators keep a reference to these lists, they are filled in place
+        JavaLexer.decisionsToDFA[:] = lexerDFA
+        JavaParser.decisionsToDFA[:] = parserDFA
+        JavaParser.sharedContextCache.cache.update(parserContextCache)
+        return True
+
+
+    # return True when a DFA for this grammar and runtime was restored
+    def load(self):
+        if self.cachePath is None or not os.path.exists(self.cachePath):
+            return False
+        try:
+            return bool(self.runWithLargeStack(self.restore))
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, IndexError) as e:
+            logging.warning('DFA cache {cachePath} is not usable: {error}'.format(cachePath=self.cachePath, error=e))
+            return False
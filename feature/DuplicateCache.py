@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+from .SourceLoader import digestContent
+
+
+class DuplicateCache():
+
+    # maxEntryNumber : features kept, the least recently used blob is dropped first, None keeps every blob
+    def __init__(self, maxEntryNumber=4096):
+        self.maxEntryNumber = maxEntryNumber
+        self.featureDict = OrderedDict()
+        self.hitNumber = 0
+        self.missNumber = 0
+        self.uniqueNumber = 0
+        self.duplicateByteSize = 0
+
+
+    def digest(self, data):
+        return digestContent(data)
+
+
+    # return the features of an identical blob seen before, without its FileName and FilePath
+    def lookup(self, digest, byteSize):
+        features = self.featureDict.get(digest)
+        if features is None:
+            self.missNumber += 1
+            return None
+
+        self.featureDict.move_to_end(digest)
+        self.hitNumber += 1
+        self.duplicateByteSize += byteSize
+        return features
+
+
+    def store(self, digest, fileFeatures):
+        self.featureDict[digest] = {key: value for key, value in fileFeatures.items()
+                                    if key != 'FileName' and key != 'FilePath'}
+        # a blob dropped before and seen again is parsed and counted again
+        self.uniqueNumber += 1
+        if self.maxEntryNumber is not None and len(self.featureDict) > self.maxEntryNumber:
+            self.featureDict.popitem(last=False)
+
+
+    def statistics(self):
+        return {
+            'UniqueFileNumber': self.uniqueNumber,
+            'DuplicateFileNumber': self.hitNumber,
+            'DuplicateByteSize': self.duplicateByteSize
+        }
@@ -0,0 +1,66 @@
+import codecs
+import chardet
+
+from chardet.universaldetector import UniversalDetector
+
+
+class EncodingDetector():
+
+    # mode 'fast'    : strict ascii/utf-8 first, bounded chardet sampling on failure
+    # mode 'chardet' : chardet over the whole buffer
+    def __init__(self, mode='fast', sampleSize=64 * 1024, chunkSize=4096):
+        if mode not in ('fast', 'chardet'):
+            raise ValueError('unknown encoding detection mode: {mode}'.format(mode=mode))
+
+        self.mode = mode
+        self.sampleSize = sampleSize
+        self.chunkSize = chunkSize
+
+
+    # return the text of a utf-8 buffer, None when it is not utf-8
+    # the text is kept, SourceFile does not decode the buffer a second time
+    def decodeUtf8(self, data, encoding='utf-8'):
+        try:
+            return codecs.decode(data, encoding)
+        except UnicodeDecodeError:
+            return None
+
+
+    def detectFull(self, data):
+        return chardet.detect(data)['encoding']
+
+
+    def detectSample(self, data):
+        if len(data) <= self.chunkSize:
+            return self.detectFull(data)
+
+        detector = UniversalDetector()
+        sample = memoryview(data)[:self.sampleSize]
+        for start in range(0, len(sample), self.chunkSize):
+            detector.feed(sample[start:start + self.chunkSize].tobytes())
+            if detector.done:
+                break
+        return detector.close()['encoding']
+
+
+    # return (encoding, text), text is the decoded buffer when the detection decoded it, None otherwise
+    def detectText(self, data):
+        if self.mode == 'chardet':
+            return self.detectFull(data), None
+
+        if data.startswith(codecs.BOM_UTF8):
+            text = self.decodeUtf8(data, 'utf-8-sig')
+            if text is not None:
+                return 'UTF-8-SIG', text
+        elif data.isascii():
+            return 'ascii', None
+        else:
+            text = self.decodeUtf8(data)
+            if text is not None:
+                return 'utf-8', text
+
+        return self.detectSample(data), None
+
+
+    def detect(self, data):
+        return self.detectText(data)[0]
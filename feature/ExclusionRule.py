@@ -0,0 +1,135 @@
+from fnmatch import fnmatchcase
+
+
+class ExclusionRule():
+
+    # markers generators write at the start of a comment line, e.g. ExclusionRule(generatedMarkerList=
+    # ExclusionRule.defaultGeneratedMarkerList), they are matched with their case
+    defaultGeneratedMarkerList = [
+        b'@generated', b'Generated by the protocol buffer compiler', b'DO NOT EDIT',
+        b'Autogenerated by Thrift'
+    ]
+
+    # patternList / ignoreFilePath : gitignore-like globs relative to the person path,
+    #                                'dir/' only matches directories, '!' negation is not supported
+    # generatedMarkerList          : a file is generated when a line of the comments before its first code,
+    #                                in the first headerSize bytes, starts with one of these byte markers,
+    #                                None checks no marker
+    def __init__(self, patternList=None, ignoreFilePath=None, generatedMarkerList=None,
+                 headerSize=4096, maxByteSize=None, maxLineNumber=None):
+        self.patternList = list(patternList) if patternList is not None else []
+        if ignoreFilePath is not None:
+            self.patternList.extend(self.loadIgnoreFile(ignoreFilePath))
+        self.generatedMarkerList = generatedMarkerList if generatedMarkerList is not None else []
+        self.headerSize = headerSize
+        self.maxByteSize = maxByteSize
+        self.maxLineNumber = maxLineNumber
+
+        self.skipCount = {
+            'Pattern': 0,
+            'PatternDirectory': 0,
+            'ByteSize': 0,
+            'GeneratedHeader': 0,
+            'LineNumber': 0
+        }
+
+
+    def loadIgnoreFile(self, ignoreFilePath):
+        patternList = []
+        with open(ignoreFilePath) as fp:
+            for line in fp:
+                line = line.strip()
+                if line and not line.startswith('#') and not line.startswith('!'):
+                    patternList.append(line)
+        return patternList
+
+
+    def matchPattern(self, relativePath, isDirectory):
+        name = relativePath.rsplit('/', 1)[-1]
+        for pattern in self.patternList:
+            if pattern.endswith('/') and not isDirectory:
+                continue
+            pattern = pattern.rstrip('/')
+            if '/' in pattern:
+                if fnmatchcase(relativePath, pattern.lstrip('/')):
+                    return True
+            elif fnmatchcase(name, pattern):
+                return True
+        return False
+
+
+    # used by the directory walk to prune a whole directory, its files are neither listed nor counted
+    def excludeDirectory(self, relativePath):
+        if self.matchPattern(relativePath, True):
+            self.skipCount['PatternDirectory'] += 1
+            return True
+        return False
+
+
+    # path and size rules, applied before the file is read
+    # checkParent is needed when the parent directories were not walked (archive and git members)
+    def excludePath(self, relativePath, byteSize, checkParent=False):
+        excluded = self.matchPattern(relativePath, False)
+        if not excluded and checkParent:
+            directoryList = relativePath.split('/')[:-1]
+            for index in range(len(directoryList)):
+                if self.matchPattern('/'.join(directoryList[:index + 1]), True):
+                    excluded = True
+                    break
+        if excluded:
+            self.skipCount['Pattern'] += 1
+            return True
+
+        if self.maxByteSize is not None and byteSize > self.maxByteSize:
+            self.skipCount['ByteSize'] += 1
+            return True
+        return False
+
+
+    # lines of the comments at the head of the file, up to its first code, without '//', '/*', '*' and '*/'
+    def leadingCommentLine(self, data):
+        commentLineList = []
+        inBlock = False
+        for line in bytes(data[:self.headerSize]).split(b'\n'):
+            line = line.strip()
+            if not inBlock:
+                if line.startswith(b'\xef\xbb\xbf'):
+                    line = line[3:]
+                if not line:
+                    continue
+                if line.startswith(b'//'):
+                    commentLineList.append(line[2:].strip())
+                    continue
+                if not line.startswith(b'/*'):
+                    break
+                line = line[2:]
+                inBlock = True
+
+            end = line.find(b'*/')
+            if end < 0:
+                commentLineList.append(line.lstrip(b'*').strip())
+                continue
+            inBlock = False
+            commentLineList.append(line[:end].lstrip(b'*').strip())
+            # code after the end of the block ends the head of the file
+            if line[end + 2:].strip():
+                break
+        return commentLineList
+
+
+    # header and line rules, applied to the raw bytes before decoding and parsing
+    def excludeContent(self, data):
+        if self.generatedMarkerList:
+            for line in self.leadingCommentLine(data):
+                if line.startswith(tuple(self.generatedMarkerList)):
+                    self.skipCount['GeneratedHeader'] += 1
+                    return True
+
+        if self.maxLineNumber is not None:
+            lineNumber = data.count(b'\n')
+            if data and not data.endswith(b'\n'):
+                lineNumber += 1
+            if lineNumber > self.maxLineNumber:
+                self.skipCount['LineNumber'] += 1
+                return True
+        return False
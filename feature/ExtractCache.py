@@ -0,0 +1,42 @@
+import sys
+
+from .ExtractSummary import ExtractSummary
+from .SqliteCache import SqliteCache, cacheFingerprint
+
+
+# ExtractSummary of already parsed files, keyed by the content hash and encoding of the file.
+# With the token tables of a TokenCache, features are recomputed without lexing or parsing.
+class ExtractCache(SqliteCache):
+
+    tableDict = {
+        'extract': 'hash BLOB, encoding TEXT, grammar TEXT, scalar TEXT, function BLOB, PRIMARY KEY (hash, encoding)'
+    }
+    # modules whose logic gives the summaries, a change in any of them invalidates every entry
+    extractorModuleList = ('.grammer.JavaExtract', '.grammer.ExtractRecord', '.ExtractSummary')
+
+    def __init__(self, cachePath, commitInterval=1000, timeout=30):
+        super().__init__(cachePath, commitInterval, timeout)
+        self.grammar = cacheFingerprint(('.grammer.JavaLexer', '.grammer.JavaParser'), self.extractorModuleList,
+                                        (ExtractSummary.version, sys.byteorder))
+
+
+    def lookup(self, source):
+        row = self.connection.execute(
+            'SELECT grammar, scalar, function FROM extract WHERE hash = ? AND encoding = ?',
+            (source.contentDigest(), source.encoding or '')
+        ).fetchone()
+        if row is None or row[0] != self.grammar:
+            self.missNumber += 1
+            return None
+
+        self.hitNumber += 1
+        return ExtractSummary.fromRow(row[1], row[2])
+
+
+    def store(self, source, summary):
+        scalar, data = summary.toRow()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO extract VALUES (?, ?, ?, ?, ?)',
+            (source.contentDigest(), source.encoding or '', self.grammar, scalar, data)
+        )
+        self.written()
@@ -0,0 +1,95 @@
+import json
+from array import array
+
+
+# The part of the JavaExtract state the code features are computed from:
+# its counters, the exception names, the access control count and, per method,
+# start line, end line, parameter number and the lines of its local variables.
+class ExtractSummary():
+
+    version = 1
+    counterList = [
+        'functionNumber', 'lambdaFunctionNumber', 'exceptionNumber',
+        'ternaryOperatorNumber', 'controlStructureNumber', 'literalNumber'
+    ]
+
+    def __init__(self):
+        self.functionNumber = 0
+        self.lambdaFunctionNumber = 0
+        self.exceptionNumber = 0
+        self.ternaryOperatorNumber = 0
+        self.controlStructureNumber = 0
+        self.literalNumber = 0
+        self.exceptionNameList = []
+        self.accessControlCount = dict()
+
+        self.functionStartLineArray = array('i')
+        self.functionEndLineArray = array('i')
+        self.functionParamNumberArray = array('i')
+        self.localVariableNumberArray = array('i')
+        # local variable lines of every method, one method after the other
+        self.localVariableLineArray = array('i')
+
+
+    @classmethod
+    def fromListener(cls, listener):
+        summary = cls()
+        for counter in cls.counterList:
+            setattr(summary, counter, getattr(listener, counter))
+        summary.exceptionNameList = list(listener.exceptionNameList)
+        summary.accessControlCount = dict(listener.accessControlCount)
+
+        for function in listener.functionList:
+            summary.functionStartLineArray.append(function.startLine)
+            summary.functionEndLineArray.append(function.endLine)
+            summary.functionParamNumberArray.append(len(function.paramList))
+            summary.localVariableNumberArray.append(len(function.localVariableList))
+            for variable in function.localVariableList:
+                summary.localVariableLineArray.append(variable.line)
+        return summary
+
+
+    # scalars as json, the method columns one after the other in native byte order
+    @classmethod
+    def fromRow(cls, scalar, data):
+        summary = cls()
+        scalarDict = json.loads(scalar)
+        for counter in cls.counterList:
+            setattr(summary, counter, scalarDict[counter])
+        summary.exceptionNameList = scalarDict['exceptionNameList']
+        summary.accessControlCount = dict(scalarDict['accessControlCount'])
+
+        columnArray = array('i')
+        columnArray.frombytes(data)
+        functionNumber = len(columnArray) - scalarDict['localVariableNumber']
+        functionNumber //= 4
+        summary.functionStartLineArray = columnArray[:functionNumber]
+        summary.functionEndLineArray = columnArray[functionNumber:2 * functionNumber]
+        summary.functionParamNumberArray = columnArray[2 * functionNumber:3 * functionNumber]
+        summary.localVariableNumberArray = columnArray[3 * functionNumber:4 * functionNumber]
+        summary.localVariableLineArray = columnArray[4 * functionNumber:]
+        return summary
+
+
+    def toRow(self):
+        scalarDict = {counter: getattr(self, counter) for counter in self.counterList}
+        scalarDict['exceptionNameList'] = self.exceptionNameList
+        # a list of pairs keeps the key order of the term frequency
+        scalarDict['accessControlCount'] = list(self.accessControlCount.items())
+        scalarDict['localVariableNumber'] = len(self.localVariableLineArray)
+
+        data = b''.join(column.tobytes() for column in (
+            self.functionStartLineArray, self.functionEndLineArray, self.functionParamNumberArray,
+            self.localVariableNumberArray, self.localVariableLineArray
+        ))
+        return json.dumps(scalarDict, separators=(',', ':')), data
+
+
+    # yield (startLine, endLine, localVariableLineList) of every method
+    def iterFunction(self):
+        offset = 0
+        for index in range(len(self.functionStartLineArray)):
+            localVariableNumber = self.localVariableNumberArray[index]
+            yield self.functionStartLineArray[index], self.functionEndLineArray[index], \
+                self.localVariableLineArray[offset:offset + localVariableNumber]
+            offset += localVariableNumber
@@ -3,80 +3,99 @@ import math
 import os
 import re
 import numpy as np
-import chardet
 from collections import Counter
 
 from antlr4 import *
-from .grammer import JavaParser
-from .grammer import JavaLexer
+from antlr4.error.Errors import ParseCancellationException
 from .grammer import JavaExtract
+from .grammer import JavaLexer
+from .ExtractSummary import ExtractSummary
+from .ListenerWalker import ListenerWalker
+from .StreamingListener import StreamingListener
+from .ParseBudget import ParseBudgetExceeded
+from .ParserSession import ParserSession
+from .SourceLoader import SourceLoader
+from .LineScanner import LineScanner, countInOrder
+from .TextScanner import TextScanner
+from .TextScanner import usageRuleScanner, stringOutputRuleScanner, tokenDelimiterPattern
+from .TokenTable import TokenTable
 
 
 class FileParser():
 
-    def __init__(self):
-        self.listener = JavaExtract()
-        self.walker = ParseTreeWalker()
-
-
-    def calaulateUsage(self, fileData):
-        code = ''
-        for line in fileData:
-            code += line
-
-        # usage after jdk8
-        rules_new = [
-            r"\-\>", r"\.stream", r"Instant\.", r"LocalDate\.", r"LocalTime\.",
-            r"LocalDateTime\.", r"ZonedDateTime\.", r"Period\.",
-            r"ZoneOffset\.", r"Clock\.", r"Optional\.", r"var", r"copyOf\(",
-            r"ByteArrayOutputStream\(", r"\.transferTo", r"\.isBlank",
-            r"\.strip", r"\.stripTrailing", r"\.stripLeading", r"\.repeat",
-            r"Pack200\.", r"\"\"\"", r"\@\S+\n\@\S+\n"
-        ]
-        # abandon usage
-        rules_old = [
-            r"com\.sun\.awt\.AWTUtilities", r"sun\.misc\.Unsafe\.defineClass",
-            r"Thread\.destroy", r"Thread\.stop", r"jdk\.snmp"
-        ]
-        # safety usage
-        rules_safety = [
-            r"public final", r"private final", r"SecurityManager",
-            r"synchronized", r"volatile", r"ReentrantLock"
-        ]
-
-        newUsageNumber = sum([len(re.findall(rule, code)) for rule in rules_new])
-        oldUsageNumber = sum([len(re.findall(rule, code)) for rule in rules_old])
-        safetyUsageNumber = sum([len(re.findall(rule, code)) for rule in rules_safety])
-        
-        return newUsageNumber / (newUsageNumber + oldUsageNumber) if newUsageNumber + oldUsageNumber != 0 else None, None
+    # code features derived from the JavaExtract listener, null when only the lexer runs
+    listenerFeatureList = [
+        'FunctionAvgLength', 'LocalVariableLocationVarience', 'LambdaFunctionNumberRate',
+        'roughExceptionNumberRate', 'TernaryOperatorNumberRate', 'ControlStructNumberRate',
+        'LiteralNumberRate', 'FunctionNumberRate', 'ParamsAvgNumber', 'ParamsNumberStandardDev',
+        'AccessControlTF'
+    ]
+
+    # predictionMode 'SLL' : try SLL with a bail out error strategy, retry in LL only when it fails
+    # predictionMode 'LL'  : full LL prediction only
+    # parseMode 'full'     : lexer, parser and listener
+    # parseMode 'lexical'  : lexer only, listener-based features are null
+    # listenMode 'walk'    : the listener walks the parse tree once it is built
+    # listenMode 'parse'   : the listener follows the parser, the tree is pruned as rules are exited
+    # parseBudget          : per file token and time limits of the parser, see ParseBudget
+    # tokenCache           : TokenCache of the token tables of files already lexed
+    # extractCache         : ExtractCache of the listener summaries of files already parsed,
+    #                        with tokenCache a re-run recomputes the features without lexer or parser
+    # verbose              : the report of a file also lists its methods, with their parameters,
+    #                        local variables and calls, the listener runs even when extractCache has the file
+    # bodyMode 'span'      : the verbose method bodies are built from the token table once the file is parsed
+    # bodyMode 'text'      : opt-in to the ctx.getText() bodies of the listener, which keeps every method subtree.
+    #                        The bodies only differ for methods recovered from syntax errors: getText() also
+    #                        holds the tokens the recovery conjured, e.g. <missing ';'>
+    def __init__(self, loader=None, predictionMode='SLL', parseMode='full', listenMode='walk',
+                 parseBudget=None, tokenCache=None, extractCache=None, verbose=False, bodyMode='span'):
+        if predictionMode not in ('SLL', 'LL'):
+            raise ValueError('unknown prediction mode: {mode}'.format(mode=predictionMode))
+        if parseMode not in ('full', 'lexical'):
+            raise ValueError('unknown parse mode: {mode}'.format(mode=parseMode))
+        if listenMode not in ('walk', 'parse'):
+            raise ValueError('unknown listen mode: {mode}'.format(mode=listenMode))
+
+        # one instance parses every file of a worker, the listener is reset before each file
+        self.session = ParserSession()
+        self.listener = JavaExtract(bodyMode)
+        # listener-based features are computed from the summary of the listener
+        self.summary = ExtractSummary()
+        self.walker = ListenerWalker()
+        self.loader = loader if loader is not None else SourceLoader()
+        self.predictionMode = predictionMode
+        self.parseMode = parseMode
+        self.listenMode = listenMode
+        self.parseBudget = parseBudget
+        self.tokenCache = tokenCache
+        self.extractCache = extractCache
+        self.verbose = verbose
+        self.parseStatistics = {
+            'SLL': 0,
+            'LLFallback': 0,
+            'LL': 0,
+            'Lexical': 0,
+            'OverBudget': 0,
+            'Cached': 0
+        }
 
 
-    def extractStringOutput(self, code):
-        rules = [
-            r'info[(]"(.*?)"[)]',
-            r'err[(]"(.*?)"[)]',
-            r'error[(]"(.*?)"[)]',
-            r'[sS]ystem.err.println[(]"(.*?)"[)];',
-            r'[sS]ystem.out.println[(]"(.*?)"[)]',
-            r'[sS]ystem.out.printf[(]"(.*?)"[)]',
-            r'[sS]ystem.out.print[(]"(.*?)"[)]'
-        ]
-
-        stringOutput = []
-        for rule in rules:
-            stringOutput.extend(re.findall(rule, code))
+    def calaulateUsage(self, fileData, textScanner=None):
+        if textScanner is not None:
+            newUsageNumber, oldUsageNumber, safetyUsageNumber = textScanner.countUsage()
+        else:
+            code = ''.join(fileData)
+            newUsageNumber, oldUsageNumber, safetyUsageNumber = usageRuleScanner.countCategory(code)
         
-        return stringOutput
+        return newUsageNumber / (newUsageNumber + oldUsageNumber) if newUsageNumber + oldUsageNumber != 0 else None, None
 
 
-    def extractComment(self, tokenStream: CommonTokenStream):
-        commentList = []
+    def extractStringOutput(self, code):
+        return stringOutputRuleScanner.findAll(code)
 
-        for token in tokenStream.tokens:
-            if token.channel == 4:
-                commentList.append(token.text)
 
-        return commentList
+    def extractComment(self, tokenTable: TokenTable):
+        return [tokenTable.tokenText(index) for index in tokenTable.indexOfChannel(JavaLexer.COMMENTS)]
 
 
     def judgeCommentType(self, comment):
@@ -118,25 +137,25 @@ class FileParser():
 
 
     def calculateFunctionAvgLength(self):
-        if self.listener.functionNumber == 0:
+        if self.summary.functionNumber == 0:
             return None
         
         functionLength = []
-        for function in self.listener.functionList:
-            functionLength.append(function['functionEndLine'] - function['functionStartLine'] + 1)
+        for functionStartLine, functionEndLine, _ in self.summary.iterFunction():
+            functionLength.append(functionEndLine - functionStartLine + 1)
 
         return np.average(functionLength)
 
 
     def calculateVariableLocationVariance(self):
-        if self.listener.functionNumber == 0:
+        if self.summary.functionNumber == 0:
             return None
 
         variableRelativeLocationAfterNorm = []
-        for function in self.listener.functionList:
-            functionLength = function['functionEndLine'] - function['functionStartLine'] + 1
-            for variable in function['localVariableList']:
-                variableRelativeLocationAfterNorm.append((variable['Line'] - function['functionStartLine'] + 1) / functionLength)
+        for functionStartLine, functionEndLine, localVariableLineList in self.summary.iterFunction():
+            functionLength = functionEndLine - functionStartLine + 1
+            for variableLine in localVariableLineList:
+                variableRelativeLocationAfterNorm.append((variableLine - functionStartLine + 1) / functionLength)
         
         if len(variableRelativeLocationAfterNorm) == 0:
             return None
@@ -192,17 +211,12 @@ class FileParser():
         return None, False
 
 
-    def extractAllIdentifier(self, tokenStream: CommonTokenStream):
-        identifierList = []
-        for token in tokenStream.tokens:
-            if token.type == 129:
-                identifierList.append(token.text)
-        
-        return identifierList
+    def extractAllIdentifier(self, tokenTable: TokenTable):
+        return [tokenTable.tokenText(index) for index in tokenTable.indexOfType(JavaLexer.IDENTIFIER)]
 
 
-    def calculateEnglishLevelAndNormalNamingRate(self, tokenStream):
-        identifierList = self.extractAllIdentifier(tokenStream)
+    def calculateEnglishLevelAndNormalNamingRate(self, tokenTable):
+        identifierList = self.extractAllIdentifier(tokenTable)
 
         if len(identifierList) == 0:
             return None, None, None
@@ -237,58 +251,51 @@ class FileParser():
 
 
     def calculateLambdaFunctionCallMethod(self):
-        if self.listener.lambdaFunctionNumber + self.listener.functionNumber == 0:
+        if self.summary.lambdaFunctionNumber + self.summary.functionNumber == 0:
             return None
 
-        return self.listener.lambdaFunctionNumber / (self.listener.lambdaFunctionNumber + self.listener.functionNumber)
+        return self.summary.lambdaFunctionNumber / (self.summary.lambdaFunctionNumber + self.summary.functionNumber)
 
 
     def calculateRoughExceptionRate(self):
-        if self.listener.exceptionNumber == 0 :
+        if self.summary.exceptionNumber == 0 :
             return None
 
         roughExceptNumber = 0
-        for exceptName in self.listener.exceptionNameList:
+        for exceptName in self.summary.exceptionNameList:
             if exceptName == 'Exception':
                 roughExceptNumber += 1
 
-        return roughExceptNumber / self.listener.exceptionNumber
+        return roughExceptNumber / self.summary.exceptionNumber
 
 
-    def calWordTermFrequencyAndCountOfLine(self, fileData):
-        word = []
-        wordCountOfLine = []
-        
-        for line in fileData:
-            wordOfLine = re.split('\s+', line)
-            word.extend(wordOfLine)
-            wordCountOfLine.append(len(wordOfLine))
-        
-        if len(word) == 0:
+    def calWordTermFrequencyAndCountOfLine(self, lineScanner: LineScanner):
+        if lineScanner.lineNumber == 0:
             return None, None
+        wordFrequency, wordTotalCount = lineScanner.countWord()
+        wordCountOfLineFrequency = countInOrder(lineScanner.wordCountArray)
 
-        wordFrequency = Counter(word)
-        wordTotalCount = len(word)
         wordTermFrequency = {}
         for word, frequency in wordFrequency.items():
             wordTermFrequency[word] = frequency / wordTotalCount
 
-        wordCountOfLineFrequency = Counter(wordCountOfLine)
-
         return wordTermFrequency, wordCountOfLineFrequency
 
 
     def calTernaryOperatorRate(self, text):
-        ternaryOperatorRate = self.listener.ternaryOperatorNumber / len(text)
+        ternaryOperatorRate = self.summary.ternaryOperatorNumber / len(text)
         if ternaryOperatorRate == 0:
             return None
         else:
             return math.log(ternaryOperatorRate)
 
 
-    def calTokenRate(self, text):
-        token = re.split('[*;\\{\\}\\[\\]()+=\\-&/|%!?:,<>~`\\s\"]', text)
-        tokenRate = len(token) / len(text)
+    def calTokenRate(self, text, textScanner=None):
+        if textScanner is not None:
+            tokenRate = textScanner.countToken() / textScanner.charLength
+        else:
+            token = re.split(tokenDelimiterPattern, text)
+            tokenRate = len(token) / len(text)
         if tokenRate == 0:
             return None
         else:
@@ -296,7 +303,7 @@ class FileParser():
 
 
     def calControlStructureRate(self, text):
-        controlStructureNumberRate = self.listener.controlStructureNumber / len(text)
+        controlStructureNumberRate = self.summary.controlStructureNumber / len(text)
         if controlStructureNumberRate == 0:
             return None
         else:
@@ -304,18 +311,16 @@ class FileParser():
         
 
     def calLiteralRate(self, text):
-        literalNumberRate = self.listener.literalNumber / len(text)
+        literalNumberRate = self.summary.literalNumber / len(text)
         if literalNumberRate == 0:
             return None
         else:
             return math.log(literalNumberRate)
 
 
-    def calKeywordRate(self, tokenStream: CommonTokenStream, text):
-        tokenNumber = 0
-        for token in tokenStream.tokens:
-            if token.type >= 1 and token.type <= 66:
-                tokenNumber += 1
+    def calKeywordRate(self, tokenTable: TokenTable, text):
+        # keywords from ABSTRACT to NON_SEALED, one more than the keyword term frequency counts
+        tokenNumber = tokenTable.typeRangeNumber(JavaLexer.ABSTRACT, JavaLexer.NON_SEALED)
         tokenNumberRate = tokenNumber / len(text)
         if tokenNumberRate == 0:
             return None
@@ -324,15 +329,13 @@ class FileParser():
 
 
     def calFunctionRate(self, text):
-        functionNumberTermRate = self.listener.functionNumber / len(text)
+        functionNumberTermRate = self.summary.functionNumber / len(text)
         functionNumberRate = math.log(functionNumberTermRate) if functionNumberTermRate != 0 else None
         return functionNumberRate
 
 
     def calParamsAvgAndStandardDev(self):
-        paramNumeber = []
-        for function in self.listener.functionList:
-            paramNumeber.append(len(function['functionParams']))
+        paramNumeber = list(self.summary.functionParamNumberArray)
         
         if len(paramNumeber) == 0:
             return 0.0, 0.0
@@ -340,34 +343,25 @@ class FileParser():
         return sum(paramNumeber) / len(paramNumeber), np.std(paramNumeber)
 
 
-    def calLineLengthAvgAndStandardDev(self, fileData):
-        lineLength = [len(line) for line in fileData]
-        lineLengthCount = Counter(lineLength)
-        
-        return sum(lineLength) / len(lineLength), np.std(lineLength), lineLengthCount
-
+    def calLineLengthAvgAndStandardDev(self, lineScanner: LineScanner):
+        lineLength = lineScanner.lineLengthArray
+        return int(lineLength.sum()) / len(lineLength), np.std(lineLength), countInOrder(lineLength)
 
-    def calBlanklineRate(self, fileData):
-        blankCount = 0
-        bufferCount = 0
-        leadingFlag = False
-        for line in fileData:
-            if re.fullmatch('[\s]*', line):
-                if leadingFlag:
-                    bufferCount += 1
-            else:
-                blankCount += bufferCount
-                bufferCount = 1
-                leadingFlag = True
 
-        return math.log(blankCount / len(fileData))
+    def calBlanklineRate(self, lineScanner: LineScanner):
+        # each line from the first line with code to the last one adds one, but the first
+        nonBlankLine = np.flatnonzero(~lineScanner.blankArray)
+        blankCount = int(nonBlankLine[-1] - nonBlankLine[0]) if len(nonBlankLine) != 0 else 0
+        return math.log(blankCount / lineScanner.lineNumber)
 
 
     # return tabRate, spaceRate, and whiteSpaceRate
-    def calWhiteSpacesRate(self, text):
-        tabTermCount = len(re.findall('\\t', text)) / len(text)
-        spaceTermCount = len(re.findall(' ', text)) / len(text)
-        newLineTermCount = len(re.findall('\\n', text)) / len(text)
+    def calWhiteSpacesRate(self, lineScanner: LineScanner):
+        tabCount, spaceCount, newLineCount = [lineScanner.countCode(letter) for letter in '\t \n']
+        textLength = len(lineScanner.text)
+        tabTermCount = tabCount / textLength
+        spaceTermCount = spaceCount / textLength
+        newLineTermCount = newLineCount / textLength
 
         tabCountRate = math.log(tabTermCount) if tabTermCount != 0 else None
         spaceCountRate = math.log(spaceTermCount) if spaceTermCount != 0 else None
@@ -378,61 +372,76 @@ class FileParser():
 
     # return > 0 : tabIndent majority   
     # return < 0 : spaceIndent majority
-    def isTabOrSpaceIndent(self, fileData):
-        tabIndent = 0
-        spaceIndent = 0
-        for line in fileData:
-            if line.startswith('\\t'):
-                tabIndent += 1
-            elif line.startswith(' '):
-                spaceIndent += 1
-
-        return tabIndent > spaceIndent
+    # lines starting with a tab are not counted, the tab indent is the two characters '\\t'
+    def isTabOrSpaceIndent(self, lineScanner: LineScanner):
+        return lineScanner.countLineStartingWith('\\t') > lineScanner.countLineStartingWith(' ')
+
+
+    # A default channel token is on a new line when a newline token separates it from the
+    # default channel token before it, otherwise it is on the line of that token.
+    # One pass over the token columns counts, for the braces and the keywords that follow a '}':
+    # OpenBraceNewLine, OpenBraceOnLine : '{' on a new line, '{' on the line of the code before it
+    # CloseBraceNewLine, CloseBrace     : '}' on a new line, every '}'
+    # ElseCuddled, Else                 : '} else' on one line, every 'else' after a '}'
+    # CatchCuddled, Catch               : same for 'catch' and 'finally'
+    def calBraceLayout(self, tokenTable: TokenTable):
+        defaultIndex = tokenTable.indexOfChannel(Token.DEFAULT_CHANNEL)
+        # newline tokens before each token, the newline tokens are not on the default channel
+        newLineNumber = np.cumsum(tokenTable.typeVector == JavaLexer.ENTER)[defaultIndex]
+        onNewLine = newLineNumber > np.concatenate(([0], newLineNumber[:-1]))
+        defaultType = tokenTable.typeVector[defaultIndex]
+        afterCloseBrace = np.concatenate(([False], defaultType[:-1] == JavaLexer.RBRACE))
+
+        openBrace = defaultType == JavaLexer.LBRACE
+        closeBrace = defaultType == JavaLexer.RBRACE
+        cuddledElse = (defaultType == JavaLexer.ELSE) & afterCloseBrace
+        cuddledCatch = ((defaultType == JavaLexer.CATCH) | (defaultType == JavaLexer.FINALLY)) & afterCloseBrace
+        return {
+            'OpenBraceNewLine': int(np.count_nonzero(openBrace & onNewLine)),
+            'OpenBraceOnLine': int(np.count_nonzero(openBrace & ~onNewLine)),
+            'CloseBraceNewLine': int(np.count_nonzero(closeBrace & onNewLine)),
+            'CloseBrace': int(np.count_nonzero(closeBrace)),
+            'ElseCuddled': int(np.count_nonzero(cuddledElse & ~onNewLine)),
+            'Else': int(np.count_nonzero(cuddledElse)),
+            'CatchCuddled': int(np.count_nonzero(cuddledCatch & ~onNewLine)),
+            'Catch': int(np.count_nonzero(cuddledCatch))
+        }
 
 
     # return > 0 : newLine majority Before Open Brace
     # return < 0 : OnLine majority Before Open Brace
-    def isNewLineOrOnLineBeforeOpenBrance(self, tokenStream: CommonTokenStream):
-        newLineCount = 0
-        onLineCount = 0
-        for token in tokenStream.tokens:
-            if token.text != '{':
-                continue
-            previousLetterIndex = tokenStream.previousTokenOnChannel(token.tokenIndex, 0)
-            previousNewLineIndex = tokenStream.previousTokenOnChannel(token.tokenIndex, 2)
-            if previousNewLineIndex > previousLetterIndex:
-                newLineCount += 1
-            elif previousNewLineIndex < previousLetterIndex:
-                onLineCount += 1
+    # It used to compare the '{' itself with the last token of the whitespace channel, not the
+    # code before the brace with the last newline token, and was False for every file with a brace.
+    def isNewLineOrOnLineBeforeOpenBrance(self, braceLayout):
+        return braceLayout['OpenBraceNewLine'] > braceLayout['OpenBraceOnLine']
+
 
-        return newLineCount > onLineCount
+    # return the rates of '} else' and '} catch' / '} finally' on one line, and of '}' on its own line
+    def calBraceLayoutRate(self, braceLayout):
+        layoutRate = []
+        for count, total in (('ElseCuddled', 'Else'), ('CatchCuddled', 'Catch'), ('CloseBraceNewLine', 'CloseBrace')):
+            layoutRate.append(braceLayout[count] / braceLayout[total] if braceLayout[total] != 0 else None)
+        return tuple(layoutRate)
 
 
     # Return AST Leaves TF And Keyword TF
     # AST Leaves consist of 130 types
     # java has 65 kinds of keyword
-    def calASTLeavesAndKeywordTermFrequency(self, tokenStream: CommonTokenStream):
-        ASTLeavesTypeCount = []
-        for token in tokenStream.tokens:
-            ASTLeavesTypeCount.append(token.type)
-
+    def calASTLeavesAndKeywordTermFrequency(self, tokenTable: TokenTable):
         # ASTLeavesCount:
         # index 0 : Unknown
         # index 1-65: keyword
         # index 66-129: operator identifier comment
-        ASTLeavesCount = Counter(ASTLeavesTypeCount)
+        ASTLeavesCount = tokenTable.typeCount()
 
-        keywordTotalCount = 0
-        for index in ASTLeavesCount.keys():
-            if index >= 1 and index <= 65:
-                keywordTotalCount += ASTLeavesCount[index]
+        keywordTotalCount = tokenTable.typeRangeNumber(JavaLexer.ABSTRACT, JavaLexer.PERMITS)
 
         keywordTermFrequency = dict()
         for index in ASTLeavesCount.keys():
-            if index >= 1 and index <= 65:
+            if index >= JavaLexer.ABSTRACT and index <= JavaLexer.PERMITS:
                 keywordTermFrequency[index] = ASTLeavesCount[index] / keywordTotalCount
 
-        ASTLeavesTotalCount = len(ASTLeavesTypeCount)
+        ASTLeavesTotalCount = len(tokenTable)
         ASTLeavesTermFrequency = dict()
         for index in ASTLeavesCount.keys():
             ASTLeavesTermFrequency[index] = ASTLeavesCount[index] / ASTLeavesTotalCount
@@ -440,26 +449,24 @@ class FileParser():
         return keywordTermFrequency, ASTLeavesTermFrequency
 
 
-    def calIndentifierLengthFrequency(self, tokenStream: CommonTokenStream):
-        identifierLength = []
-        for token in tokenStream.tokens:
-            if token.type == 129:
-                identifierLength.append(len(token.text))
-        
-        identifierLengthCount = Counter(identifierLength)
+    def calIndentifierLengthFrequency(self, tokenTable: TokenTable):
+        # identifiers are never the EOF token, their length is their character span
+        identifierIndex = tokenTable.indexOfType(JavaLexer.IDENTIFIER)
+        identifierLength = tokenTable.stopVector[identifierIndex] - tokenTable.startVector[identifierIndex] + 1
+        identifierLengthCount = Counter(identifierLength.tolist())
 
         return identifierLengthCount
 
 
     def calAccessControlTermFrequency(self):
         accessControlTF = {}
-        accessControlTotalCount = sum(self.listener.accessControlCount.values())
+        accessControlTotalCount = sum(self.summary.accessControlCount.values())
 
         if accessControlTotalCount == 0:
             return None
 
-        for accessControl in self.listener.accessControlCount.keys():
-            accessControlTF[accessControl] = self.listener.accessControlCount[accessControl] / accessControlTotalCount
+        for accessControl in self.summary.accessControlCount.keys():
+            accessControlTF[accessControl] = self.summary.accessControlCount[accessControl] / accessControlTotalCount
         
         return accessControlTF
 
@@ -553,29 +560,31 @@ class FileParser():
 
         return np.mean(neuroticism)
 
-    def extractCodeFeatures(self, file, fileData, tokenStream):
+    def extractCodeFeatures(self, file, fileData, tokenTable, textScanner, lineScanner):
         codeFeatures = dict()
-        codeFeatures['NewUsageNumberRate'], codeFeatures['SafetyUsageNumberRate'] = self.calaulateUsage(fileData)
-        codeFeatures['CommentNumberRate'], codeFeatures['CommentTypeTF']= self.calculateCommentRateAndTypeTermFrequency(self.extractComment(tokenStream), file)
+        codeFeatures['NewUsageNumberRate'], codeFeatures['SafetyUsageNumberRate'] = self.calaulateUsage(fileData, textScanner)
+        codeFeatures['CommentNumberRate'], codeFeatures['CommentTypeTF']= self.calculateCommentRateAndTypeTermFrequency(self.extractComment(tokenTable), file)
         codeFeatures['FunctionAvgLength'] = self.calculateFunctionAvgLength()
         codeFeatures['LocalVariableLocationVarience'] = self.calculateVariableLocationVariance()
-        codeFeatures['EnglishLevel'], codeFeatures['CammelConventionNumberRate'], codeFeatures['UnderScoreConventionNumberRate'] = self.calculateEnglishLevelAndNormalNamingRate(tokenStream)
+        codeFeatures['EnglishLevel'], codeFeatures['CammelConventionNumberRate'], codeFeatures['UnderScoreConventionNumberRate'] = self.calculateEnglishLevelAndNormalNamingRate(tokenTable)
         codeFeatures['LambdaFunctionNumberRate'] = self.calculateLambdaFunctionCallMethod()
         codeFeatures['roughExceptionNumberRate'] = self.calculateRoughExceptionRate()
-        codeFeatures['WordNumberTF'], codeFeatures['WordNumberOfLineFrequency']  = self.calWordTermFrequencyAndCountOfLine(fileData)
+        codeFeatures['WordNumberTF'], codeFeatures['WordNumberOfLineFrequency']  = self.calWordTermFrequencyAndCountOfLine(lineScanner)
         codeFeatures['TernaryOperatorNumberRate'] = self.calTernaryOperatorRate(file)
         codeFeatures['ControlStructNumberRate'] = self.calControlStructureRate(file)
         codeFeatures['LiteralNumberRate'] = self.calLiteralRate(file)
-        codeFeatures['KeywordNumberRate'] = self.calKeywordRate(tokenStream, file)
+        codeFeatures['KeywordNumberRate'] = self.calKeywordRate(tokenTable, file)
         codeFeatures['FunctionNumberRate'] = self.calFunctionRate(file)
         codeFeatures['ParamsAvgNumber'], codeFeatures['ParamsNumberStandardDev'] = self.calParamsAvgAndStandardDev()
-        codeFeatures['LineAvgLength'], codeFeatures['LineLengthStandardDev'], codeFeatures['LineLengthFrequency'] = self.calLineLengthAvgAndStandardDev(fileData)
-        codeFeatures['BlankLineNumberRate'] = self.calBlanklineRate(fileData)
-        codeFeatures['TabNumberRate'], codeFeatures['SpaceNumberRate'], codeFeatures['NewLineNumberRate'] = self.calWhiteSpacesRate(file)
-        codeFeatures['IsTabOrSpaceIndent'] = self.isTabOrSpaceIndent(fileData)
-        codeFeatures['IsNewLineOrOnLineBeforeOpenBrance'] = self.isNewLineOrOnLineBeforeOpenBrance(tokenStream)
-        codeFeatures['keywordTF'], codeFeatures['ASTLeavesTF'] = self.calASTLeavesAndKeywordTermFrequency(tokenStream)
-        codeFeatures['IndentifierLengthFrequency'] = self.calIndentifierLengthFrequency(tokenStream)
+        codeFeatures['LineAvgLength'], codeFeatures['LineLengthStandardDev'], codeFeatures['LineLengthFrequency'] = self.calLineLengthAvgAndStandardDev(lineScanner)
+        codeFeatures['BlankLineNumberRate'] = self.calBlanklineRate(lineScanner)
+        codeFeatures['TabNumberRate'], codeFeatures['SpaceNumberRate'], codeFeatures['NewLineNumberRate'] = self.calWhiteSpacesRate(lineScanner)
+        codeFeatures['IsTabOrSpaceIndent'] = self.isTabOrSpaceIndent(lineScanner)
+        braceLayout = self.calBraceLayout(tokenTable)
+        codeFeatures['IsNewLineOrOnLineBeforeOpenBrance'] = self.isNewLineOrOnLineBeforeOpenBrance(braceLayout)
+        codeFeatures['CuddledElseRate'], codeFeatures['CuddledCatchRate'], codeFeatures['CloseBraceNewLineRate'] = self.calBraceLayoutRate(braceLayout)
+        codeFeatures['keywordTF'], codeFeatures['ASTLeavesTF'] = self.calASTLeavesAndKeywordTermFrequency(tokenTable)
+        codeFeatures['IndentifierLengthFrequency'] = self.calIndentifierLengthFrequency(tokenTable)
         codeFeatures['AccessControlTF'] = self.calAccessControlTermFrequency()
         return codeFeatures
 
@@ -598,32 +607,154 @@ class FileParser():
         return psychologicalFeatures
 
 
-    def parseFile(self, filePath):
-        with open(filePath, 'rb') as fp:
-            file = fp.read()
-        fileMode = chardet.detect(file)["encoding"]
-
-        with open(filePath, 'r', encoding=fileMode) as fp:
-            file = fp.read()
+    # method bodies are only kept as token spans by the listener, their text is read from the token table
+    def exportFunctionList(self, tokenTable):
+        functionList = self.listener.exportFunctionList()
+        if self.listener.bodyMode == 'span':
+            # the default channel tokens of the method, getText() of a method parsed without errors
+            for function, functionRecord in zip(functionList, self.listener.functionList):
+                if functionRecord.bodySpan is not None:
+                    function['functionBody'] = tokenTable.spanText(*functionRecord.bodySpan)
+        return functionList
+
+
+    def listenParser(self, parser, bailOut):
+        parser.removeParseListeners()
+        if self.listenMode == 'parse':
+            parser.addParseListener(StreamingListener(self.listener, self.walker, bailOut))
+
+
+    def parseCompilationUnit(self, tokenStream):
+        parser = self.session.prepareParser(tokenStream)
+        if self.parseBudget is not None:
+            self.parseBudget.installDeadline(parser)
+
+        if self.predictionMode == 'LL':
+            self.listenParser(parser, False)
+            self.parseStatistics['LL'] += 1
+            return parser.compilationUnit()
+
+        # SLL either gives the LL parse tree or a syntax error, errors are reported by the LL retry
+        parser._interp.predictionMode = PredictionMode.SLL
+        parser._errHandler = BailErrorStrategy()
+        parser.removeErrorListeners()
+        self.listenParser(parser, True)
+        try:
+            tree = parser.compilationUnit()
+            self.parseStatistics['SLL'] += 1
+            return tree
+        except ParseCancellationException:
+            pass
+
+        # the LL retry counts against the deadline of the SLL attempt
+        parser = self.session.prepareParser(tokenStream, parser._interp)
+        # the failed SLL attempt may have fed the listener
+        self.listener.reset()
+        self.listenParser(parser, False)
+        self.parseStatistics['LLFallback'] += 1
+        return parser.compilationUnit()
+
+
+    # the lexer is skipped when the tokens of the source are cached
+    def createTokenStream(self, source, tokenTable=None):
+        if tokenTable is None:
+            return self.session.tokenize(source.inputStream())
+        return self.session.replay(tokenTable.createTokenList(source.inputStream()))
+
+
+    def parseSource(self, source):
+        file = source.text
+        fileData = source.lines
+        self.listener.reset()
+
+        tokenTable = None
+        if self.tokenCache is not None:
+            tokenTable = self.tokenCache.lookup(source)
+
+        tokenStream = None
+        summary = None
+        parseMode = self.parseMode
+        parseReason = None
+        if parseMode == 'full' and self.extractCache is not None and not self.verbose:
+            summary = self.extractCache.lookup(source)
+
+        if parseMode == 'lexical':
+            if tokenTable is None:
+                tokenStream = self.createTokenStream(source)
+                tokenStream.fill()
+            self.parseStatistics['Lexical'] += 1
+        elif summary is not None:
+            # the listener summary is cached, the file is not parsed again
+            if tokenTable is None:
+                tokenStream = self.createTokenStream(source)
+                tokenStream.fill()
+            self.parseStatistics['Cached'] += 1
+        else:
+            tokenStream = self.createTokenStream(source, tokenTable)
+            try:
+                if self.parseBudget is not None:
+                    tokenStream.fill()
+                    self.parseBudget.checkTokenNumber(len(tokenStream.tokens))
+                # parse ast
+                tree = self.parseCompilationUnit(tokenStream)
+                if self.listenMode == 'walk':
+                    self.walker.walk(self.listener, tree)
+            except ParseBudgetExceeded as e:
+                # drop what a listener following the parser saw, the listener-based features are not used
+                self.listener.reset()
+                tokenStream.fill()
+                parseMode = 'lexical' if self.parseBudget.action == 'lexical' else 'skipped'
+                parseReason = e.reason
+                self.parseStatistics['OverBudget'] += 1
+            else:
+                summary = ExtractSummary.fromListener(self.listener)
+                if self.extractCache is not None:
+                    self.extractCache.store(source, summary)
 
-        # parse ast
-        tokenStream = CommonTokenStream(JavaLexer(InputStream(file)))
-        parser = JavaParser(tokenStream)
-        self.walker.walk(self.listener, parser.compilationUnit())
+        # the listener is empty when the walk did not run
+        self.summary = summary if summary is not None else ExtractSummary.fromListener(self.listener)
 
-        with open(filePath, 'r', encoding=fileMode) as fp:
-            fileData = fp.readlines()
+        # token features read the columns of the table, not the ANTLR tokens
+        if tokenTable is None:
+            tokenTable = TokenTable.fromTokenList(file, tokenStream.tokens)
+            if self.tokenCache is not None and tokenTable.isComplete():
+                self.tokenCache.store(source, tokenTable)
 
-        codeFeatures = self.extractCodeFeatures(file, fileData, tokenStream)
         fileFeatures = {
-            'FileName': filePath.split('/')[-1],
-            'FilePath': filePath,
-            'CodeFeatures': codeFeatures,
-            'PsychologicalFeatures': self.extractPsychologicalFeatures(codeFeatures)
+            'FileName': source.filePath.split('/')[-1],
+            'FilePath': source.filePath,
+            'CodeFeatures': None,
+            'PsychologicalFeatures': None
         }
+        if parseMode != 'skipped':
+            # regex text features are counted over the raw bytes when that gives the same result
+            textScanner = TextScanner.fromSource(source)
+            # the line and whitespace features read the arrays of one pass over the text
+            lineScanner = LineScanner(file)
+            codeFeatures = self.extractCodeFeatures(file, fileData, tokenTable, textScanner, lineScanner)
+            if parseMode == 'lexical':
+                for feature in self.listenerFeatureList:
+                    codeFeatures[feature] = None
+            fileFeatures['CodeFeatures'] = codeFeatures
+            fileFeatures['PsychologicalFeatures'] = self.extractPsychologicalFeatures(codeFeatures)
+
+        if parseMode != 'full':
+            fileFeatures['ParseMode'] = parseMode
+        if parseReason is not None:
+            fileFeatures['ParseReason'] = parseReason
+        if self.verbose:
+            fileFeatures['FunctionList'] = self.exportFunctionList(tokenTable) if parseMode == 'full' else None
 
         return fileFeatures
 
+
+    def parseBytes(self, filePath, data):
+        return self.parseSource(self.loader.loadBytes(filePath, data))
+
+
+    def parseFile(self, filePath):
+        return self.parseSource(self.loader.load(filePath))
+
     
     def outputFileFeatureToJson(self, filePath, outDir):
         fileFeature = self.parseFile(filePath)
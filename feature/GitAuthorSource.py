@@ -0,0 +1,160 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .GitSource import GitSource
+from .SqliteCache import SqliteCache
+
+
+class BlameCache(SqliteCache):
+
+    tableDict = {
+        'blame': 'blob TEXT, path TEXT, author_line TEXT, PRIMARY KEY (blob, path)'
+    }
+
+    def lookup(self, blobId, path):
+        row = self.connection.execute(
+            'SELECT author_line FROM blame WHERE blob = ? AND path = ?', (blobId, path)
+        ).fetchone()
+        if row is None:
+            self.missNumber += 1
+            return None
+
+        self.hitNumber += 1
+        return json.loads(row[0])
+
+
+    def store(self, blobId, path, authorLine):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO blame VALUES (?, ?, ?)', (blobId, path, json.dumps(authorLine))
+        )
+        self.written()
+
+
+class GitAuthorSource():
+
+    # mode 'numstat' : a file belongs to the author who added most of its lines in git log
+    # mode 'blame'   : a file belongs to the author of most of its lines at the revision
+    # blameProcessNumber : git blame processes run at the same time
+    def __init__(self, repoPath, revision='HEAD', mode='numstat', blameCache=None, blameProcessNumber=4):
+        if mode not in ('numstat', 'blame'):
+            raise ValueError('unknown author attribution mode: {mode}'.format(mode=mode))
+
+        self.repoPath = repoPath
+        self.revision = revision
+        self.mode = mode
+        self.blameCache = blameCache
+        self.blameProcessNumber = blameProcessNumber
+        self.gitSource = GitSource(repoPath, revision)
+
+
+    # return {path: {author: addedLineNumber}} from one git log run
+    def collectAddedLine(self):
+        addedLine = dict()
+        output = self.gitSource.runGit('-c', 'core.quotepath=off', 'log', '--numstat', '--no-renames',
+                                       '--format=%x00%aN', self.revision, '--', '*.java')
+        author = None
+        for line in output.decode('utf-8', 'surrogateescape').split('\n'):
+            if line.startswith('\0'):
+                author = line[1:]
+                continue
+
+            fieldList = line.split('\t', 2)
+            if author is None or len(fieldList) != 3 or not fieldList[0].isdigit():
+                continue
+            authorCount = addedLine.setdefault(fieldList[2], dict())
+            authorCount[author] = authorCount.get(author, 0) + int(fieldList[0])
+
+        return addedLine
+
+
+    # return {author: [[startLine, endLine], ...]} for the lines of a file at the revision
+    def blameAuthorLine(self, blobId, path):
+        return self.blameAuthorLineOfBlob([(blobId, path)])[0]
+
+
+    # blameAuthorLine of every (blobId, path), the files missing from the cache are blamed concurrently
+    def blameAuthorLineOfBlob(self, blobList):
+        authorLineList = [None] * len(blobList)
+        if self.blameCache is not None:
+            authorLineList = [self.blameCache.lookup(blobId, path) for blobId, path in blobList]
+
+        missIndexList = [index for index, authorLine in enumerate(authorLineList) if authorLine is None]
+        with ThreadPoolExecutor(self.blameProcessNumber) as executor:
+            outputList = executor.map(lambda index: self.gitSource.runGit(
+                'blame', '--porcelain', self.revision, '--', blobList[index][1]), missIndexList)
+            for index, output in zip(missIndexList, outputList):
+                authorLineList[index] = self.parseBlame(output)
+                if self.blameCache is not None:
+                    self.blameCache.store(blobList[index][0], blobList[index][1], authorLineList[index])
+
+        return authorLineList
+
+
+    def parseBlame(self, output):
+        authorLine = dict()
+        commitAuthor = dict()
+        commitId = None
+        lineNumber = None
+        isHeader = True
+        for line in output.decode('utf-8', 'surrogateescape').split('\n'):
+            if isHeader:
+                fieldList = line.split(' ')
+                if len(fieldList) < 3:
+                    continue
+                commitId = fieldList[0]
+                lineNumber = int(fieldList[2])
+                isHeader = False
+            elif line.startswith('\t'):
+                author = commitAuthor.get(commitId, '')
+                rangeList = authorLine.setdefault(author, [])
+                if rangeList and rangeList[-1][1] == lineNumber - 1:
+                    rangeList[-1][1] = lineNumber
+                else:
+                    rangeList.append([lineNumber, lineNumber])
+                isHeader = True
+            elif line.startswith('author '):
+                commitAuthor[commitId] = line[len('author '):]
+
+        return authorLine
+
+
+    # return {author: [(blobId, path)]}, every .java file of the revision goes to one author
+    # memberFilter(path, byteSize) : True for the blobs to skip, they are neither blamed nor read
+    def attributeFile(self, memberFilter=None):
+        authorFile = dict()
+        blobList = [(blobId, path) for blobId, path, byteSize in self.gitSource.listJavaBlob()
+                    if memberFilter is None or not memberFilter(path, byteSize)]
+        if self.mode == 'numstat':
+            addedLine = self.collectAddedLine()
+            authorCountList = [addedLine.get(path, dict()) for _, path in blobList]
+        else:
+            authorCountList = [{author: sum(end - start + 1 for start, end in rangeList)
+                                for author, rangeList in authorLine.items()}
+                               for authorLine in self.blameAuthorLineOfBlob(blobList)]
+
+        for (blobId, path), authorCount in zip(blobList, authorCountList):
+            if len(authorCount) == 0:
+                continue
+            author = max(sorted(authorCount), key=lambda name: authorCount[name])
+            authorFile.setdefault(author, []).append((blobId, path))
+
+        return authorFile
+
+
+    def iterFileOfAuthor(self, blobList):
+        for blobId, path in blobList:
+            yield self.repoPath.rstrip('/') + '/' + path, self.gitSource.readBlob(blobId)
+
+
+    # yield (author, iterator of (path, data)), the blobs are read through one cat-file process
+    def iterAuthorSource(self, memberFilter=None):
+        authorFile = self.attributeFile(memberFilter)
+        for author in sorted(authorFile):
+            yield author, self.iterFileOfAuthor(authorFile[author])
+
+
+    # the blame cache is flushed at the end of every repository, it is closed by its owner
+    def close(self):
+        self.gitSource.close()
+        if self.blameCache is not None:
+            self.blameCache.flush()
@@ -0,0 +1,68 @@
+import subprocess
+
+
+class GitSource():
+
+    def __init__(self, repoPath, revision='HEAD'):
+        self.repoPath = repoPath
+        self.revision = revision
+        self.catFileProcess = None
+
+
+    def runGit(self, *args):
+        return subprocess.run(['git', '-C', self.repoPath] + list(args),
+                              stdout=subprocess.PIPE, check=True).stdout
+
+
+    # return [(blobId, path, byteSize)] of every .java blob in the tree of the revision
+    def listJavaBlob(self):
+        blobList = []
+        output = self.runGit('ls-tree', '-r', '-l', '-z', '--full-tree', self.revision)
+        for record in output.split(b'\0'):
+            if not record:
+                continue
+            header, path = record.split(b'\t', 1)
+            # the size is padded with spaces
+            _, objectType, blobId, byteSize = header.split()
+            path = path.decode('utf-8', 'surrogateescape')
+            if objectType == b'blob' and path.endswith('.java'):
+                blobList.append((blobId.decode('ascii'), path, int(byteSize)))
+        return blobList
+
+
+    def startCatFile(self):
+        if self.catFileProcess is None:
+            self.catFileProcess = subprocess.Popen(['git', '-C', self.repoPath, 'cat-file', '--batch'],
+                                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self.catFileProcess
+
+
+    def readBlob(self, blobId):
+        process = self.startCatFile()
+        process.stdin.write(blobId.encode('ascii') + b'\n')
+        process.stdin.flush()
+
+        header = process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError('git cat-file could not read {blobId}'.format(blobId=blobId))
+        size = int(header[2])
+        data = process.stdout.read(size)
+        process.stdout.read(1)
+        return data
+
+
+    # yield (path, data) for every .java blob, all read through one cat-file process
+    # memberFilter(path, byteSize) : True for the blobs to skip, they are never read
+    def iterJavaFile(self, memberFilter=None):
+        for blobId, path, byteSize in self.listJavaBlob():
+            if memberFilter is not None and memberFilter(path, byteSize):
+                continue
+            yield self.repoPath.rstrip('/') + '/' + path, self.readBlob(blobId)
+
+
+    def close(self):
+        if self.catFileProcess is not None:
+            self.catFileProcess.stdin.close()
+            self.catFileProcess.wait()
+            self.catFileProcess.stdout.close()
+            self.catFileProcess = None
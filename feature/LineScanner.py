@@ -0,0 +1,98 @@
+import re
+import numpy as np
+from collections import Counter
+
+
+# characters matched by \s in str patterns, those of str.isspace()
+spaceCodeList = [
+    0x09, 0x0a, 0x0b, 0x0c, 0x0d, 0x1c, 0x1d, 0x1e, 0x1f, 0x20, 0x85, 0xa0, 0x1680,
+    0x2000, 0x2001, 0x2002, 0x2003, 0x2004, 0x2005, 0x2006, 0x2007, 0x2008, 0x2009, 0x200a,
+    0x2028, 0x2029, 0x202f, 0x205f, 0x3000
+]
+# isSpace of a code point is spaceTable[min(code, len(spaceTable) - 1)]
+spaceTable = np.zeros(max(spaceCodeList) + 2, dtype=bool)
+spaceTable[spaceCodeList] = True
+wordPattern = re.compile(r'\S+')
+
+
+# Counter of the values of an array, keys in the order they first appear as Counter(list) gives them
+def countInOrder(valueArray):
+    valueArray, firstIndex, countArray = np.unique(valueArray, return_index=True, return_counts=True)
+    order = np.argsort(firstIndex)
+    return Counter(dict(zip(valueArray[order].tolist(), countArray[order].tolist())))
+
+
+# One pass over the code points of a decoded text fills the per line arrays of the line
+# and whitespace features. Lines are those of SourceFile.splitLines, '\n' included.
+class LineScanner():
+
+    def __init__(self, text):
+        self.text = text
+        self.codeArray = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        codeArray = self.codeArray
+
+        lineEndArray = np.flatnonzero(codeArray == ord('\n')) + 1
+        if len(lineEndArray) == 0 or lineEndArray[-1] != len(codeArray):
+            # the last line has no '\n', it is only a line when it is not empty
+            if len(codeArray) != 0:
+                lineEndArray = np.append(lineEndArray, len(codeArray))
+        self.lineNumber = len(lineEndArray)
+        self.lineStartArray = np.concatenate(([0], lineEndArray))[:self.lineNumber].astype(np.int64)
+        self.lineLengthArray = lineEndArray - self.lineStartArray
+        if self.lineNumber == 0:
+            self.wordCountArray = self.lineLengthArray
+            self.emptyWordArray = self.lineLengthArray
+            self.startSpaceArray = np.zeros(0, dtype=bool)
+            self.blankArray = np.zeros(0, dtype=bool)
+            return
+
+        isSpace = spaceTable[np.minimum(codeArray, len(spaceTable) - 1)]
+        # a run of whitespace starts after a character that is not one, or at the start of a line
+        spaceRunStart = isSpace.copy()
+        spaceRunStart[1:] &= ~isSpace[:-1]
+        spaceRunStart[self.lineStartArray] = isSpace[self.lineStartArray]
+
+        # lines are never empty, reduceat sums every line
+        spaceRunArray = np.add.reduceat(spaceRunStart, self.lineStartArray, dtype=np.int64)
+        nonSpaceArray = np.add.reduceat(~isSpace, self.lineStartArray, dtype=np.int64)
+        self.startSpaceArray = isSpace[self.lineStartArray]
+        endSpaceArray = isSpace[lineEndArray - 1]
+
+        # re.split('\s+', line) gives one more item than whitespace runs,
+        # with '' first when the line starts with whitespace and '' last when it ends with it
+        self.wordCountArray = spaceRunArray + 1
+        self.emptyWordArray = self.startSpaceArray.astype(np.int64) + endSpaceArray
+        self.blankArray = nonSpaceArray == 0
+
+
+    def countCode(self, letter):
+        return int(np.count_nonzero(self.codeArray == ord(letter)))
+
+
+    def countLineStartingWith(self, prefix):
+        if self.lineNumber == 0:
+            return 0
+        lineMask = self.lineLengthArray >= len(prefix)
+        for offset, letter in enumerate(prefix):
+            codeIndex = np.minimum(self.lineStartArray + offset, len(self.codeArray) - 1)
+            lineMask &= self.codeArray[codeIndex] == ord(letter)
+        return int(np.count_nonzero(lineMask))
+
+
+    # Counter of the items of re.split('\s+', line) over every line, in the order they appear, and their number
+    # the words are those of one findall over the text, '' is put at its first place
+    def countWord(self):
+        wordList = wordPattern.findall(self.text)
+        emptyWordNumber = int(self.emptyWordArray.sum())
+        if emptyWordNumber != 0:
+            firstLine = int(np.flatnonzero(self.emptyWordArray)[0])
+            nonEmptyWordArray = self.wordCountArray - self.emptyWordArray
+            position = int(nonEmptyWordArray[:firstLine].sum())
+            if not self.startSpaceArray[firstLine]:
+                position += int(nonEmptyWordArray[firstLine])
+            wordList.insert(position, '')
+
+        wordCount = Counter(wordList)
+        if emptyWordNumber != 0:
+            wordCount[''] = emptyWordNumber
+        return wordCount, int(self.wordCountArray.sum())
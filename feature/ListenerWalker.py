@@ -0,0 +1,90 @@
+from antlr4.tree.Tree import ErrorNode, ParseTreeListener, TerminalNode
+
+from .grammer.JavaParserListener import JavaParserListener
+
+
+# Same events in the same order as ParseTreeWalker.walk, but only the handlers the
+# listener class overrides are called, the no-op methods it inherits are skipped.
+# The tree is walked with an explicit stack, its depth is not bound by the recursion limit.
+class ListenerWalker():
+
+    baseListenerList = [JavaParserListener, ParseTreeListener]
+    exitMark = object()
+
+    def __init__(self):
+        # {listenerClass: {contextClass: (enterHandler, exitHandler)}}
+        self.dispatchTable = dict()
+        # {listenerClass: (enterEveryRule, exitEveryRule, visitTerminal, visitErrorNode)}
+        self.genericTable = dict()
+
+
+    def findHandler(self, listenerClass, name):
+        function = getattr(listenerClass, name, None)
+        if function is None:
+            return None
+        for baseListener in self.baseListenerList:
+            if getattr(baseListener, name, None) is function:
+                return None
+        return function
+
+
+    # generated contexts XContext dispatch to enterX and exitX
+    def contextHandler(self, listenerClass, contextClass):
+        ruleName = contextClass.__name__[:-len('Context')]
+        return self.findHandler(listenerClass, 'enter' + ruleName), \
+            self.findHandler(listenerClass, 'exit' + ruleName)
+
+
+    def genericHandler(self, listenerClass):
+        if listenerClass not in self.genericTable:
+            self.genericTable[listenerClass] = tuple(
+                self.findHandler(listenerClass, name)
+                for name in ('enterEveryRule', 'exitEveryRule', 'visitTerminal', 'visitErrorNode')
+            )
+        return self.genericTable[listenerClass]
+
+
+    def walk(self, listener, tree):
+        listenerClass = type(listener)
+        handlerTable = self.dispatchTable.setdefault(listenerClass, dict())
+        enterEveryRule, exitEveryRule, visitTerminal, visitErrorNode = self.genericHandler(listenerClass)
+        visitTerminalNode = visitTerminal is not None or visitErrorNode is not None
+
+        # a node to exit is pushed under exitMark, before its children
+        exitMark = self.exitMark
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node is exitMark:
+                node = stack.pop()
+                exitHandler = handlerTable[type(node)][1]
+                if exitHandler is not None:
+                    exitHandler(listener, node)
+                if exitEveryRule is not None:
+                    exitEveryRule(listener, node)
+                continue
+
+            if isinstance(node, TerminalNode):
+                if not visitTerminalNode:
+                    continue
+                if isinstance(node, ErrorNode):
+                    if visitErrorNode is not None:
+                        visitErrorNode(listener, node)
+                elif visitTerminal is not None:
+                    visitTerminal(listener, node)
+                continue
+
+            contextClass = type(node)
+            handler = handlerTable.get(contextClass)
+            if handler is None:
+                handler = handlerTable[contextClass] = self.contextHandler(listenerClass, contextClass)
+
+            if enterEveryRule is not None:
+                enterEveryRule(listener, node)
+            if handler[0] is not None:
+                handler[0](listener, node)
+            if handler[1] is not None or exitEveryRule is not None:
+                stack.append(node)
+                stack.append(exitMark)
+            if node.children:
+                stack.extend(reversed(node.children))
@@ -0,0 +1,44 @@
+from .SqliteCache import SqliteCache
+from .SourceLoader import digestContent
+
+
+class MetadataCache(SqliteCache):
+
+    tableDict = {
+        'metadata': 'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash BLOB, encoding TEXT'
+    }
+    schemaVersion = 2
+
+    def __init__(self, cachePath, verifyHash=False, commitInterval=1000, timeout=30):
+        super().__init__(cachePath, commitInterval, timeout)
+        self.verifyHash = verifyHash
+
+
+    def hashContent(self, data):
+        if not self.verifyHash:
+            return None
+        return digestContent(data)
+
+
+    # return the encoding, or None when the entry is missing or stale
+    def lookup(self, filePath, size, mtimeNs, data=None):
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, hash, encoding FROM metadata WHERE path = ?',
+            (filePath,)
+        ).fetchone()
+
+        if row is None or row[0] != size or row[1] != mtimeNs \
+            or (self.verifyHash and row[2] != self.hashContent(data)):
+            self.missNumber += 1
+            return None
+
+        self.hitNumber += 1
+        return row[3]
+
+
+    def store(self, filePath, size, mtimeNs, encoding, data=None):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)',
+            (filePath, size, mtimeNs, self.hashContent(data), encoding)
+        )
+        self.written()
@@ -0,0 +1,72 @@
+import time
+
+from antlr4 import ParserATNSimulator
+
+
+class ParseBudgetExceeded(Exception):
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+# Parser ATN simulator that gives up once the parse of a file is past its deadline.
+# ALL(*) prediction is where pathological files spend their time, so the clock is
+# checked on every prediction and on every lookahead step inside one.
+class BudgetATNSimulator(ParserATNSimulator):
+
+    def __init__(self, parser, atn, decisionToDFA, sharedContextCache, deadline, maxParseSeconds):
+        super().__init__(parser, atn, decisionToDFA, sharedContextCache)
+        self.deadline = deadline
+        self.maxParseSeconds = maxParseSeconds
+
+
+    def checkDeadline(self):
+        if time.monotonic() > self.deadline:
+            error = ParseBudgetExceeded('ParseTime > {seconds}s'.format(seconds=self.maxParseSeconds))
+            # mark the contexts the exception unwinds, as BailErrorStrategy does, parse listeners skip them
+            context = self.parser._ctx
+            while context is not None:
+                context.exception = error
+                context = context.parentCtx
+            raise error
+
+
+    def adaptivePredict(self, input, decision, outerContext):
+        self.checkDeadline()
+        return super().adaptivePredict(input, decision, outerContext)
+
+
+    def computeReachSet(self, closure, t, fullCtx):
+        self.checkDeadline()
+        return super().computeReachSet(closure, t, fullCtx)
+
+
+class ParseBudget():
+
+    # maxTokenNumber  : files with more tokens are not parsed
+    # maxParseSeconds : wall-clock limit of the parse of one file
+    # action 'lexical': over budget files keep their lexer-based features
+    # action 'skip'   : over budget files have no features
+    def __init__(self, maxTokenNumber=None, maxParseSeconds=None, action='lexical'):
+        if action not in ('lexical', 'skip'):
+            raise ValueError('unknown parse budget action: {action}'.format(action=action))
+
+        self.maxTokenNumber = maxTokenNumber
+        self.maxParseSeconds = maxParseSeconds
+        self.action = action
+
+
+    def checkTokenNumber(self, tokenNumber):
+        if self.maxTokenNumber is not None and tokenNumber > self.maxTokenNumber:
+            raise ParseBudgetExceeded('TokenNumber {number} > {limit}'.format(number=tokenNumber,
+                                                                              limit=self.maxTokenNumber))
+
+
+    def installDeadline(self, parser):
+        if self.maxParseSeconds is None:
+            return
+        interpreter = parser._interp
+        parser._interp = BudgetATNSimulator(parser, interpreter.atn, interpreter.decisionToDFA,
+                                            interpreter.sharedContextCache,
+                                            time.monotonic() + self.maxParseSeconds, self.maxParseSeconds)
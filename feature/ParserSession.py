@@ -0,0 +1,49 @@
+from antlr4 import CommonTokenStream, PredictionMode
+from antlr4.error.ErrorListener import ConsoleErrorListener
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from antlr4.ListTokenSource import ListTokenSource
+
+from .grammer import JavaLexer
+from .grammer import JavaParser
+
+
+# One lexer, token stream and parser reused for every file parsed by a worker.
+# Each file rewinds them with setInputStream/reset and the parser gets back the
+# configuration of a new JavaParser, whatever the previous file changed.
+class ParserSession():
+
+    def __init__(self):
+        self.lexer = JavaLexer(None)
+        self.tokenStream = CommonTokenStream(self.lexer)
+        self.parser = JavaParser(self.tokenStream)
+        # ParseBudget replaces the simulator of the parser, the next file starts from this one
+        self.interpreter = self.parser._interp
+
+
+    def tokenize(self, inputStream):
+        self.lexer.inputStream = inputStream
+        self.tokenStream.setTokenSource(self.lexer)
+        return self.tokenStream
+
+
+    # tokens of a TokenTable, the lexer does not run
+    def replay(self, tokenList):
+        self.tokenStream.setTokenSource(ListTokenSource(tokenList))
+        return self.tokenStream
+
+
+    # interpreter : simulator kept from an attempt of the same file, e.g. with its parse deadline
+    def prepareParser(self, tokenStream, interpreter=None):
+        parser = self.parser
+        # reset() fails on a parser with parse listeners
+        parser.removeParseListeners()
+        parser._interp = interpreter if interpreter is not None else self.interpreter
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        parser.removeErrorListeners()
+        parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+        parser.buildParseTrees = True
+        parser.setTokenStream(tokenStream)
+        # rewind a stream already read by an earlier attempt
+        tokenStream.seek(0)
+        return parser
@@ -2,53 +2,212 @@ import os
 import json
 
 
+from .ArchiveSource import ArchiveSource
+from .DuplicateCache import DuplicateCache
 from .FileParser import FileParser
+from .GitAuthorSource import GitAuthorSource
+from .GitSource import GitSource
+from .SourceLoader import SourceLoader
 
 
 class PersonParser():
 
-    def __init__(self):
-        pass
+    # fileParserOption : keyword arguments of every FileParser, e.g. {'predictionMode': 'LL'}
+    # duplicateEntryNumber : features of distinct blobs kept for the deduplication
+    def __init__(self, loader=None, maxDepth=None, deduplicate=True, exclusionRule=None,
+                 fileParserOption=None, duplicateEntryNumber=4096):
+        self.loader = loader if loader is not None else SourceLoader()
+        self.fileParserOption = fileParserOption if fileParserOption is not None else dict()
+        # one parser session for every file, its lexer, parser and listener are reused
+        self.fileParser = FileParser(self.loader, **self.fileParserOption)
+        self.maxDepth = maxDepth
+        self.exclusionRule = exclusionRule
+        # identical blobs, across every person parsed by this instance, are analysed once
+        self.duplicateCache = DuplicateCache(duplicateEntryNumber) if deduplicate else None
+
+
+    # walk inputPath depth first, in directory order, yielding (path, size, mtime_ns)
+    # directories already visited (symlink loops) and those deeper than maxDepth are skipped
+    def iterJavaFile(self, inputPath, maxDepth=None):
+        if maxDepth is None:
+            maxDepth = self.maxDepth
+
+        rootPrefix = os.path.join(inputPath, '')
+        rootStat = os.stat(inputPath)
+        visitedDirectory = {(rootStat.st_dev, rootStat.st_ino)}
+        with os.scandir(inputPath) as it:
+            stack = [iter(list(it))]
+
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            try:
+                if entry.is_dir():
+                    if maxDepth is not None and len(stack) > maxDepth:
+                        continue
+                    if self.exclusionRule is not None \
+                        and self.exclusionRule.excludeDirectory(entry.path[len(rootPrefix):]):
+                        continue
+                    entryStat = entry.stat()
+                    directoryKey = (entryStat.st_dev, entryStat.st_ino)
+                    if directoryKey in visitedDirectory:
+                        continue
+                    visitedDirectory.add(directoryKey)
+                    with os.scandir(entry.path) as it:
+                        stack.append(iter(list(it)))
+                elif entry.name.endswith('.java'):
+                    entryStat = entry.stat()
+                    if self.exclusionRule is not None \
+                        and self.exclusionRule.excludePath(entry.path[len(rootPrefix):], entryStat.st_size):
+                        continue
+                    yield entry.path, entryStat.st_size, entryStat.st_mtime_ns
+            except OSError:
+                continue
 
 
     def extractAllJavaFilePath(self, inputPath):
-        javaFilePath = []
-        fileNameList = os.listdir(inputPath)
-        for fileName in fileNameList:
-            filePath = os.path.join(inputPath, fileName)
-            if os.path.isdir(filePath):
-                javaFilePath.extend(self.extractAllJavaFilePath(filePath))
-            elif filePath.endswith('.java'):
-                javaFilePath.append(filePath)
+        return [filePath for filePath, _, _ in self.iterJavaFile(inputPath)]
 
-        return javaFilePath
 
-    
-    def parseSingleFile(self, filePath):
-        fileParser = FileParser()
-        return fileParser.parseFile(filePath)
+    # yield (filePath, data) for every java file of a person
+    # data is None for files on disk, they are read when parsed
+    def iterPersonSource(self, personPath):
+        if ArchiveSource.isArchive(personPath):
+            yield from ArchiveSource(personPath).iterJavaFile(self.excludeMember)
+            return
 
+        for filePath, _, _ in self.iterJavaFile(personPath):
+            yield filePath, None
 
-    def parseFileOfPerson(self, personPath):
-        filePathList = self.extractAllJavaFilePath(personPath)
 
+    # path and size rules for archive members and git blobs, checked from their listing before they are read
+    def excludeMember(self, relativePath, byteSize):
+        return self.exclusionRule is not None \
+            and self.exclusionRule.excludePath(relativePath, byteSize, checkParent=True)
+
+
+    def extractPersonName(self, personPath):
+        if ArchiveSource.isArchive(personPath):
+            return ArchiveSource(personPath).personName()
+        return personPath.split('/')[-1]
+
+
+    def statistics(self):
+        statistics = {'ParseStatistics': dict(self.fileParser.parseStatistics)}
+        if self.duplicateCache is not None:
+            statistics['DuplicateStatistics'] = self.duplicateCache.statistics()
+        if self.exclusionRule is not None:
+            statistics['ExclusionStatistics'] = dict(self.exclusionRule.skipCount)
+        if self.loader.metadataCache is not None:
+            statistics['MetadataCacheStatistics'] = self.loader.metadataCache.statistics()
+        for option, name in (('tokenCache', 'TokenCacheStatistics'), ('extractCache', 'ExtractCacheStatistics')):
+            cache = self.fileParserOption.get(option)
+            if cache is not None:
+                statistics[name] = cache.statistics()
+        return statistics
+
+
+    def loadSource(self, filePath, data, fileStat):
+        if fileStat is not None:
+            return self.loader.loadFile(filePath, data, fileStat)
+        return self.loader.loadBytes(filePath, data)
+
+
+    # return None when the file is excluded by its content
+    def parseSingleFile(self, filePath, data=None):
+        fileStat = None
+        if data is None:
+            data, fileStat = self.loader.readFile(filePath)
+
+        if self.exclusionRule is not None and self.exclusionRule.excludeContent(data):
+            return None
+
+        if self.duplicateCache is None:
+            return self.fileParser.parseSource(self.loadSource(filePath, data, fileStat))
+
+        digest = self.duplicateCache.digest(data)
+        features = self.duplicateCache.lookup(digest, len(data))
+        if features is not None:
+            fileFeatures = {
+                'FileName': filePath.split('/')[-1],
+                'FilePath': filePath
+            }
+            fileFeatures.update(features)
+            return fileFeatures
+
+        source = self.loadSource(filePath, data, fileStat)
+        source.digest = digest
+        fileFeatures = self.fileParser.parseSource(source)
+        self.duplicateCache.store(digest, fileFeatures)
+        return fileFeatures
+
+
+    def parseSourceOfPerson(self, personName, personPath, sourceIterator):
         personFeature = {
-            'PersonName': personPath.split('/')[-1],
+            'PersonName': personName,
             'PersonPath': personPath,
             'FileFeatures': list()
         }
-        for filePath in filePathList:
-            personFeature['FileFeatures'].append(self.parseSingleFile(filePath))
+        for filePath, data in sourceIterator:
+            fileFeatures = self.parseSingleFile(filePath, data)
+            if fileFeatures is not None:
+                personFeature['FileFeatures'].append(fileFeatures)
         
         return personFeature
 
 
-    def outputPersonFeatureToJson(self, personPath, outDir):
+    def parseFileOfPerson(self, personPath):
+        return self.parseSourceOfPerson(self.extractPersonName(personPath), personPath,
+                                        self.iterPersonSource(personPath))
+
+
+    # parse the .java blobs of a local repository at a revision, without a checkout
+    def parseFileOfRepository(self, repoPath, revision='HEAD', personName=None):
+        if personName is None:
+            personName = repoPath.rstrip('/').split('/')[-1]
+
+        gitSource = GitSource(repoPath, revision)
+        try:
+            return self.parseSourceOfPerson(personName, repoPath, gitSource.iterJavaFile(self.excludeMember))
+        finally:
+            gitSource.close()
+
+
+    # one person per commit author, only the files attributed to the author are parsed
+    def parseAuthorOfRepository(self, repoPath, revision='HEAD', mode='numstat', blameCache=None):
+        authorFeatureList = []
+        authorSource = GitAuthorSource(repoPath, revision, mode, blameCache)
+        try:
+            for author, sourceIterator in authorSource.iterAuthorSource(self.excludeMember):
+                authorFeatureList.append(self.parseSourceOfPerson(author, repoPath, sourceIterator))
+        finally:
+            authorSource.close()
+
+        return authorFeatureList
+
+
+    def outputAuthorFeatureToJson(self, repoPath, outDir, revision='HEAD', mode='numstat', blameCache=None):
+        for authorFeature in self.parseAuthorOfRepository(repoPath, revision, mode, blameCache):
+            outFileName = authorFeature['PersonName'].replace('/', '_') + '.json'
+            outFilePath = os.path.join(outDir, outFileName)
+
+            if os.path.exists(outFilePath):
+                continue
+
+            with open(outFilePath, 'w') as wp:
+                json.dump(authorFeature, wp, indent=4)
+
+
+    # overwrite : replace an existing report, e.g. when features are recomputed from the caches
+    def outputPersonFeatureToJson(self, personPath, outDir, overwrite=False):
         personFeature = self.parseFileOfPerson(personPath)
         outFileName = personFeature['PersonName'] + '.json'
         outFilePath = os.path.join(outDir, outFileName)
 
-        if os.path.exists(outFilePath):
+        if os.path.exists(outFilePath) and not overwrite:
             return
 
         with open(outFilePath, 'w') as wp:
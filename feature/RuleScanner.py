@@ -0,0 +1,75 @@
+import re
+
+
+# Matches a table of regex rules in one scan of a text. Each rule gets the matches re.findall
+# gives for it alone: the matches of one rule do not overlap, those of different rules may.
+# The alternation of every rule finds the next position where some rule matches, and one
+# anchored match reads the rules matching there from their named groups.
+class RuleScanner():
+
+    # ruleTable : {category: [pattern]}, new rules only extend the table, not the number of scans
+    # byte      : the rules match bytes-like buffers instead of str
+    def __init__(self, ruleTable, byte=False):
+        self.categoryList = list(ruleTable)
+        self.ruleList = []
+        self.categoryIndexList = []
+        for categoryIndex, ruleList in enumerate(ruleTable.values()):
+            self.ruleList.extend(ruleList)
+            self.categoryIndexList.extend([categoryIndex] * len(ruleList))
+
+        guardPattern = '|'.join('(?:{rule})'.format(rule=rule) for rule in self.ruleList)
+        # every rule is an optional lookahead, the anchored match captures all the rules matching there
+        capturePattern = ''.join('(?:(?=(?P<rule{index}>{rule}))|)'.format(index=index, rule=rule)
+                                 for index, rule in enumerate(self.ruleList))
+        if byte:
+            guardPattern = guardPattern.encode('ascii')
+            capturePattern = capturePattern.encode('ascii')
+        self.guard = re.compile(guardPattern)
+        self.capture = re.compile(capturePattern)
+        self.groupIndexList = [self.capture.groupindex['rule{index}'.format(index=index)]
+                               for index in range(len(self.ruleList))]
+        # groups of the rule itself, they follow its named group
+        self.groupNumberList = [re.compile(rule).groups for rule in self.ruleList]
+
+
+    # yield (ruleIndex, regs, groupIndex) for every match of every rule, in the order of the text
+    def iterMatch(self, text):
+        nextStartList = [0] * len(self.ruleList)
+        search = self.guard.search
+        match = self.capture.match
+        position = 0
+        while True:
+            guardMatch = search(text, position)
+            if guardMatch is None:
+                return
+            start = guardMatch.start()
+            regs = match(text, start).regs
+            for ruleIndex, groupIndex in enumerate(self.groupIndexList):
+                # findall looks for the next match of a rule after the end of its previous one
+                if regs[groupIndex][0] >= 0 and start >= nextStartList[ruleIndex]:
+                    nextStartList[ruleIndex] = regs[groupIndex][1]
+                    yield ruleIndex, regs, groupIndex
+            position = start + 1
+
+
+    # number of matches of the rules of each category
+    def countCategory(self, text):
+        countList = [0] * len(self.categoryList)
+        for ruleIndex, _, _ in self.iterMatch(text):
+            countList[self.categoryIndexList[ruleIndex]] += 1
+        return countList
+
+
+    # re.findall of every rule, one rule after the other
+    def findAll(self, text):
+        matchList = [[] for _ in self.ruleList]
+        for ruleIndex, regs, groupIndex in self.iterMatch(text):
+            groupList = [text[start:end] if start >= 0 else text[:0]
+                         for start, end in regs[groupIndex:groupIndex + self.groupNumberList[ruleIndex] + 1]]
+            if len(groupList) == 1:
+                matchList[ruleIndex].append(groupList[0])
+            elif len(groupList) == 2:
+                matchList[ruleIndex].append(groupList[1])
+            else:
+                matchList[ruleIndex].append(tuple(groupList[1:]))
+        return [match for ruleMatchList in matchList for match in ruleMatchList]
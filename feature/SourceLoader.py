@@ -0,0 +1,109 @@
+import os
+import locale
+import hashlib
+
+from antlr4 import InputStream
+from .EncodingDetector import EncodingDetector
+
+
+# content hash shared by the caches keyed by content
+def digestContent(data):
+    return hashlib.blake2b(data, digest_size=20).digest()
+
+
+class SourceFile():
+
+    # text : data already decoded with encoding, e.g. by the encoding detection
+    def __init__(self, filePath, data, encoding, text=None):
+        self.filePath = filePath
+        self.data = data
+        self.encoding = encoding
+        self.digest = None
+
+        # decode once, every view of the file is derived from this text
+        self.text = self.decode(data, encoding, text)
+        self.lines = self.splitLines(self.text)
+
+
+    def decode(self, data, encoding, text=None):
+        if text is None:
+            if encoding is None:
+                encoding = locale.getpreferredencoding(False)
+            text = str(data, encoding)
+
+        # same translation as open() in text mode with universal newlines
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+
+    # same result as readlines(), which only splits on '\n' after translation
+    def splitLines(self, text):
+        lines = text.split('\n')
+        lastLine = lines.pop()
+        lines = [line + '\n' for line in lines]
+        if lastLine:
+            lines.append(lastLine)
+        return lines
+
+
+    def contentDigest(self):
+        if self.digest is None:
+            self.digest = digestContent(self.data)
+        return self.digest
+
+
+    def inputStream(self):
+        return InputStream(self.text)
+
+
+class SourceLoader():
+
+    def __init__(self, detector=None, metadataCache=None):
+        self.detector = detector if detector is not None else EncodingDetector()
+        self.metadataCache = metadataCache
+
+
+    def loadBytes(self, filePath, data):
+        encoding, text = self.detector.detectText(data)
+        try:
+            return SourceFile(filePath, data, encoding, text)
+        except UnicodeDecodeError:
+            # a sampled guess may not hold for the whole buffer
+            if self.detector.mode == 'chardet':
+                raise
+            return SourceFile(filePath, data, self.detector.detectFull(data))
+
+
+    def loadCached(self, filePath, fileStat, data):
+        cacheKey = os.path.abspath(filePath)
+        encoding = self.metadataCache.lookup(cacheKey, fileStat.st_size, fileStat.st_mtime_ns, data)
+        if encoding is not None:
+            try:
+                return SourceFile(filePath, data, encoding)
+            except UnicodeDecodeError:
+                pass
+
+        source = self.loadBytes(filePath, data)
+        # a None encoding would read as a miss, such files are detected every time
+        if source.encoding is not None:
+            self.metadataCache.store(cacheKey, fileStat.st_size, fileStat.st_mtime_ns, source.encoding, data)
+        return source
+
+
+    def readFile(self, filePath):
+        with open(filePath, 'rb') as fp:
+            fileStat = os.fstat(fp.fileno())
+            data = fp.read()
+        return data, fileStat
+
+
+    def loadFile(self, filePath, data, fileStat):
+        if self.metadataCache is None:
+            return self.loadBytes(filePath, data)
+        return self.loadCached(filePath, fileStat, data)
+
+
+    def load(self, filePath):
+        data, fileStat = self.readFile(filePath)
+        return self.loadFile(filePath, data, fileStat)
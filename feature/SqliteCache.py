@@ -0,0 +1,85 @@
+import hashlib
+import sqlite3
+import importlib
+
+
+# Digest of what the content of a cache depends on: the serialized ATN of the grammar modules,
+# the source of the modules computing the cached values and any other value, e.g. a version.
+# A change of the extraction logic gives another fingerprint, the stale entries are not used.
+def cacheFingerprint(atnModuleList=(), sourceModuleList=(), extraList=()):
+    digest = hashlib.blake2b(digest_size=16)
+    for moduleName in atnModuleList:
+        module = importlib.import_module(moduleName, __package__)
+        digest.update(repr(module.serializedATN()).encode('ascii'))
+    for moduleName in sourceModuleList:
+        module = importlib.import_module(moduleName, __package__)
+        with open(module.__file__, 'rb') as fp:
+            digest.update(fp.read())
+    for extra in extraList:
+        digest.update(str(extra).encode('utf-8'))
+    return digest.hexdigest()
+
+
+# Connection, batched commits and hit / miss counts of a cache kept in one SQLite file.
+# The file may be shared by worker processes: it is in WAL mode, so readers do not wait for a
+# writer, and a writer waits up to timeout seconds for another one. Workers sharing a file
+# should commit often (commitInterval=1), a write transaction blocks every other writer.
+class SqliteCache():
+
+    # {table: column definitions}, the tables of another schemaVersion are dropped and created again
+    tableDict = dict()
+    schemaVersion = 1
+
+    def __init__(self, cachePath, commitInterval=1000, timeout=30):
+        self.cachePath = cachePath
+        self.commitInterval = commitInterval
+        self.pendingNumber = 0
+        self.hitNumber = 0
+        self.missNumber = 0
+
+        self.connection = sqlite3.connect(cachePath, timeout=timeout)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.createTable()
+
+
+    def createTable(self):
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != self.schemaVersion:
+            for table in self.tableDict:
+                self.connection.execute('DROP TABLE IF EXISTS {table}'.format(table=table))
+        for table, columnDefinition in self.tableDict.items():
+            self.connection.execute('CREATE TABLE IF NOT EXISTS {table} ({columnDefinition})'.format(
+                table=table, columnDefinition=columnDefinition))
+        self.connection.execute('PRAGMA user_version = {version}'.format(version=int(self.schemaVersion)))
+        self.connection.commit()
+
+
+    # count a write, the pending writes are committed every commitInterval writes
+    def written(self):
+        self.pendingNumber += 1
+        if self.pendingNumber >= self.commitInterval:
+            self.flush()
+
+
+    def statistics(self):
+        return {
+            'Hit': self.hitNumber,
+            'Miss': self.missNumber
+        }
+
+
+    def flush(self):
+        self.connection.commit()
+        self.pendingNumber = 0
+
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -0,0 +1,89 @@
+from antlr4.tree.Tree import ParseTreeListener
+
+from .ParseBudget import ParseBudgetExceeded
+
+
+# Parse listener that forwards the rule events of the parser to a tree listener, so the
+# extraction runs during the parse instead of in a second walk of the finished tree.
+# Handlers are those ListenerWalker resolves for the listener. An exited context is pruned
+# from the tree unless a handler of an open context reads it (navigationTable of the listener),
+# the tree held in memory is the path being parsed plus what the open handlers need.
+class StreamingListener(ParseTreeListener):
+
+    # bailOut : the parser stops on the first syntax error, failed contexts are not handled
+    def __init__(self, listener, walker, bailOut=False):
+        self.listener = listener
+        listenerClass = type(listener)
+        self.listenerClass = listenerClass
+        self.walker = walker
+        self.handlerTable = walker.dispatchTable.setdefault(listenerClass, dict())
+        self.navigationTable = getattr(listener, 'navigationTable', None)
+        self.bailOut = bailOut
+
+        # open contexts, and whether a handler of an enclosing context reads them
+        self.contextStack = []
+        self.retainedStack = []
+
+
+    def findHandler(self, ctx):
+        contextClass = type(ctx)
+        handler = self.handlerTable.get(contextClass)
+        if handler is None:
+            handler = self.handlerTable[contextClass] = self.walker.contextHandler(self.listenerClass, contextClass)
+        return handler
+
+
+    def isRetained(self, ctx):
+        if self.navigationTable is None:
+            return True
+        if not self.contextStack:
+            return False
+        if self.retainedStack[-1]:
+            return True
+        if type(self.contextStack[-1]) not in self.navigationTable:
+            return False
+        navigation = self.navigationTable[type(self.contextStack[-1])]
+        return navigation is None or type(ctx) in navigation
+
+
+    # contexts left by an exception unwinding the parse are not complete
+    def isFailed(self, ctx):
+        exception = ctx.exception
+        return exception is not None and (self.bailOut or isinstance(exception, ParseBudgetExceeded))
+
+
+    def enterEveryRule(self, ctx):
+        # a left-recursive rule wraps the context parsed so far in a new one,
+        # the parser never sends the exit of the wrapped context
+        if ctx.children and self.contextStack and ctx.children[0] is self.contextStack[-1]:
+            self.exitContext()
+
+        self.retainedStack.append(self.isRetained(ctx))
+        self.contextStack.append(ctx)
+        handler = self.findHandler(ctx)
+        if handler[0] is not None:
+            handler[0](self.listener, ctx)
+
+
+    def exitEveryRule(self, ctx):
+        while self.contextStack:
+            if self.exitContext() is ctx:
+                break
+
+
+    def exitContext(self):
+        ctx = self.contextStack.pop()
+        retained = self.retainedStack.pop()
+        if self.isFailed(ctx):
+            return ctx
+
+        handler = self.findHandler(ctx)
+        if handler[1] is not None:
+            handler[1](self.listener, ctx)
+
+        if not retained:
+            ctx.children = None
+            parent = ctx.parentCtx
+            if parent is not None and parent.children and parent.children[-1] is ctx:
+                parent.children.pop()
+        return ctx
@@ -0,0 +1,110 @@
+import re
+import numpy as np
+
+from .RuleScanner import RuleScanner
+
+
+# usage after jdk8
+newUsageRuleList = [
+    r"\-\>", r"\.stream", r"Instant\.", r"LocalDate\.", r"LocalTime\.",
+    r"LocalDateTime\.", r"ZonedDateTime\.", r"Period\.",
+    r"ZoneOffset\.", r"Clock\.", r"Optional\.", r"var", r"copyOf\(",
+    r"ByteArrayOutputStream\(", r"\.transferTo", r"\.isBlank",
+    r"\.strip", r"\.stripTrailing", r"\.stripLeading", r"\.repeat",
+    r"Pack200\.", r"\"\"\"", r"\@\S+\n\@\S+\n"
+]
+# abandon usage
+oldUsageRuleList = [
+    r"com\.sun\.awt\.AWTUtilities", r"sun\.misc\.Unsafe\.defineClass",
+    r"Thread\.destroy", r"Thread\.stop", r"jdk\.snmp"
+]
+# safety usage
+safetyUsageRuleList = [
+    r"public final", r"private final", r"SecurityManager",
+    r"synchronized", r"volatile", r"ReentrantLock"
+]
+stringOutputRuleList = [
+    r'info[(]"(.*?)"[)]',
+    r'err[(]"(.*?)"[)]',
+    r'error[(]"(.*?)"[)]',
+    r'[sS]ystem.err.println[(]"(.*?)"[)];',
+    r'[sS]ystem.out.println[(]"(.*?)"[)]',
+    r'[sS]ystem.out.printf[(]"(.*?)"[)]',
+    r'[sS]ystem.out.print[(]"(.*?)"[)]'
+]
+# rules of the usage features by category, each file is scanned once for all of them
+usageRuleTable = {
+    'New': newUsageRuleList,
+    'Old': oldUsageRuleList,
+    'Safety': safetyUsageRuleList
+}
+stringOutputRuleTable = {
+    'StringOutput': stringOutputRuleList
+}
+tokenDelimiterPattern = '[*;\\{\\}\\[\\]()+=\\-&/|%!?:,<>~`\\s\"]'
+
+# characters matched by \s in str patterns but not in bytes patterns
+unicodeOnlySpaceList = [
+    0x1c, 0x1d, 0x1e, 0x1f, 0x85, 0xa0, 0x1680, 0x2000, 0x2001, 0x2002, 0x2003, 0x2004,
+    0x2005, 0x2006, 0x2007, 0x2008, 0x2009, 0x200a, 0x2028, 0x2029, 0x202f, 0x205f, 0x3000
+]
+unicodeOnlySpacePattern = re.compile(b'|'.join(re.escape(chr(space).encode('utf-8'))
+                                               for space in unicodeOnlySpaceList))
+
+
+usageRuleScanner = RuleScanner(usageRuleTable)
+usageByteRuleScanner = RuleScanner(usageRuleTable, byte=True)
+stringOutputRuleScanner = RuleScanner(stringOutputRuleTable)
+tokenDelimiterByteList = [ord(' '), ord('\t'), ord('\n'), 0x0b, 0x0c] + \
+    [ord(letter) for letter in '*;{}[]()+=-&/|%!?:,<>~`"']
+
+
+# Counts the text features over the raw bytes of an ascii or utf-8 file,
+# without decoding them or building any string or match list.
+class TextScanner():
+
+    chunkSize = 1 << 20
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.byteCount = self.countByte(buffer)
+        # length of the decoded text, utf-8 continuation bytes are not characters
+        self.charLength = len(buffer) - int(self.byteCount[0x80:0xc0].sum())
+
+
+    # return None when counting bytes could differ from the text-based features:
+    # another encoding, '\r' (translated to '\n' on decoding) or whitespace only \s of str matches
+    @classmethod
+    def fromSource(cls, source):
+        encoding = (source.encoding or '').lower()
+        if encoding not in ('ascii', 'utf-8', 'utf-8-sig'):
+            return None
+
+        buffer = memoryview(source.data)
+        if encoding == 'utf-8-sig' and bytes(buffer[:3]) == b'\xef\xbb\xbf':
+            buffer = buffer[3:]
+
+        textScanner = cls(buffer)
+        if textScanner.byteCount[ord('\r')] != 0 or textScanner.byteCount[0x1c:0x20].any():
+            return None
+        if textScanner.byteCount[0x80:].any() and unicodeOnlySpacePattern.search(buffer):
+            return None
+        return textScanner
+
+
+    def countByte(self, buffer):
+        byteArray = np.frombuffer(buffer, dtype=np.uint8)
+        byteCount = np.zeros(256, dtype=np.int64)
+        for start in range(0, len(byteArray), self.chunkSize):
+            byteCount += np.bincount(byteArray[start:start + self.chunkSize], minlength=256)
+        return byteCount
+
+
+    # new, old and safety usage numbers
+    def countUsage(self):
+        return tuple(usageByteRuleScanner.countCategory(self.buffer))
+
+
+    # same as len(re.split(tokenDelimiterPattern, text))
+    def countToken(self):
+        return int(self.byteCount[tokenDelimiterByteList].sum()) + 1
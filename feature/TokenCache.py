@@ -0,0 +1,40 @@
+import sys
+import zlib
+
+from .TokenTable import TokenTable
+from .SqliteCache import SqliteCache, cacheFingerprint
+
+
+# Token tables of already lexed files, keyed by the content hash and encoding of the file.
+# Entries of another lexer grammar, token table layout or platform byte order are ignored.
+class TokenCache(SqliteCache):
+
+    tableDict = {
+        'token': 'hash BLOB, encoding TEXT, grammar TEXT, token BLOB, text TEXT, PRIMARY KEY (hash, encoding)'
+    }
+
+    def __init__(self, cachePath, commitInterval=1000, timeout=30):
+        super().__init__(cachePath, commitInterval, timeout)
+        self.grammar = cacheFingerprint(('.grammer.JavaLexer',), ('.TokenTable',), (sys.byteorder,))
+
+
+    def lookup(self, source):
+        row = self.connection.execute(
+            'SELECT grammar, token, text FROM token WHERE hash = ? AND encoding = ?',
+            (source.contentDigest(), source.encoding or '')
+        ).fetchone()
+        if row is None or row[0] != self.grammar:
+            self.missNumber += 1
+            return None
+
+        self.hitNumber += 1
+        return TokenTable.fromBytes(row[2], zlib.decompress(row[1]))
+
+
+    def store(self, source, tokenTable):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO token VALUES (?, ?, ?, ?, ?)',
+            (source.contentDigest(), source.encoding or '', self.grammar,
+             zlib.compress(tokenTable.toBytes(), 1), tokenTable.text)
+        )
+        self.written()
@@ -0,0 +1,124 @@
+import numpy as np
+from array import array
+
+from antlr4.Token import CommonToken
+
+
+# Column store of the tokens of one file, one int array per token field.
+# Token texts are slices of the decoded text, as CommonToken.text computes them.
+# The token features share NumPy views of the columns and the histogram of the token types.
+class TokenTable():
+
+    fieldList = ['type', 'channel', 'start', 'stop', 'line', 'column']
+
+    def __init__(self, text, typeArray, channelArray, startArray, stopArray, lineArray, columnArray):
+        self.text = text
+        self.typeArray = typeArray
+        self.channelArray = channelArray
+        self.startArray = startArray
+        self.stopArray = stopArray
+        self.lineArray = lineArray
+        self.columnArray = columnArray
+
+        # views without copy, array('i') holds C ints
+        self.typeVector = np.frombuffer(typeArray, dtype=np.intc)
+        self.channelVector = np.frombuffer(channelArray, dtype=np.intc)
+        self.startVector = np.frombuffer(startArray, dtype=np.intc)
+        self.stopVector = np.frombuffer(stopArray, dtype=np.intc)
+        # count of token type t at t + 1, EOF is -1
+        self.typeHistogram = np.bincount(self.typeVector + 1)
+
+
+    # one pass over the tokens fills every column
+    @classmethod
+    def fromTokenList(cls, text, tokenList):
+        typeList, channelList, startList, stopList, lineList, columnList = [[] for _ in cls.fieldList]
+        appendType, appendChannel = typeList.append, channelList.append
+        appendStart, appendStop = startList.append, stopList.append
+        appendLine, appendColumn = lineList.append, columnList.append
+        for token in tokenList:
+            appendType(token.type)
+            appendChannel(token.channel)
+            appendStart(token.start)
+            appendStop(token.stop)
+            appendLine(token.line)
+            appendColumn(token.column)
+        return cls(text, *[array('i', valueList) for valueList in
+                           (typeList, channelList, startList, stopList, lineList, columnList)])
+
+
+    # the six columns one after the other, in native byte order
+    @classmethod
+    def fromBytes(cls, text, data):
+        tokenArray = array('i')
+        tokenArray.frombytes(data)
+        tokenNumber = len(tokenArray) // len(cls.fieldList)
+        return cls(text, *[tokenArray[index * tokenNumber:(index + 1) * tokenNumber]
+                           for index in range(len(cls.fieldList))])
+
+
+    def toBytes(self):
+        return b''.join(column.tobytes() for column in self.columnList())
+
+
+    def columnList(self):
+        return [self.typeArray, self.channelArray, self.startArray, self.stopArray,
+                self.lineArray, self.columnArray]
+
+
+    def __len__(self):
+        return len(self.typeArray)
+
+
+    # a table is only cached once the lexer reached the end of the file
+    def isComplete(self):
+        return len(self.typeArray) > 0 and self.typeArray[-1] == CommonToken.EOF
+
+
+    def tokenText(self, index):
+        start = self.startArray[index]
+        stop = self.stopArray[index]
+        if start < len(self.text) and stop < len(self.text):
+            return self.text[start:stop + 1]
+        return '<EOF>'
+
+
+    # number of tokens with a type from firstType to lastType
+    def typeRangeNumber(self, firstType, lastType):
+        return int(self.typeHistogram[firstType + 1:lastType + 2].sum())
+
+
+    # {tokenType: count} in the order the types first appear, as Counter of the type column gives it
+    def typeCount(self):
+        typeList, firstIndex = np.unique(self.typeVector, return_index=True)
+        typeList = typeList[np.argsort(firstIndex)]
+        return dict(zip(typeList.tolist(), self.typeHistogram[typeList + 1].tolist()))
+
+
+    def indexOfType(self, tokenType):
+        return np.flatnonzero(self.typeVector == tokenType)
+
+
+    def indexOfChannel(self, channel):
+        return np.flatnonzero(self.channelVector == channel)
+
+
+    # text of the default channel tokens from startIndex to stopIndex, the tokens of a span
+    # as ctx.getText() joins them for a context parsed without syntax error
+    def spanText(self, startIndex, stopIndex):
+        return ''.join(self.tokenText(index) for index in range(startIndex, stopIndex + 1)
+                       if self.channelArray[index] == CommonToken.DEFAULT_CHANNEL
+                       and self.typeArray[index] != CommonToken.EOF)
+
+
+    # ANTLR tokens for the parser, their text is read from inputStream
+    def createTokenList(self, inputStream):
+        tokenList = []
+        source = (None, inputStream)
+        for index in range(len(self.typeArray)):
+            token = CommonToken(source, self.typeArray[index], self.channelArray[index],
+                                self.startArray[index], self.stopArray[index])
+            token.line = self.lineArray[index]
+            token.column = self.columnArray[index]
+            tokenList.append(token)
+        return tokenList
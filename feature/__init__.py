@@ -1,2 +1,23 @@
+from .EncodingDetector import EncodingDetector
+from .MetadataCache import MetadataCache
+from .SourceLoader import SourceLoader
+from .TextScanner import TextScanner
+from .ArchiveSource import ArchiveSource
+from .DuplicateCache import DuplicateCache
+from .ExclusionRule import ExclusionRule
+from .ParseBudget import ParseBudget
 from .FileParser import FileParser
-from .PersonParser import PersonParser
\ No newline at end of file
+from .GitSource import GitSource
+from .GitAuthorSource import BlameCache, GitAuthorSource
+from .PersonParser import PersonParser
+from .DFACache import DFACache
+from .TokenTable import TokenTable
+from .TokenCache import TokenCache
+from .ExtractSummary import ExtractSummary
+from .ExtractCache import ExtractCache
+from .ListenerWalker import ListenerWalker
+from .StreamingListener import StreamingListener
+from .ParserSession import ParserSession
+from .RuleScanner import RuleScanner
+from .LineScanner import LineScanner
+from .SqliteCache import SqliteCache
\ No newline at end of file
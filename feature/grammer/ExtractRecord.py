@@ -0,0 +1,83 @@
+# Records of the JavaExtract lists. Their fields have fixed slots instead of a dict per record,
+# toDict gives the dict the listener stored before, for a verbose export.
+
+
+class ParamRecord():
+
+    __slots__ = ('type', 'identifier')
+
+    def __init__(self, type, identifier):
+        self.type = type
+        self.identifier = identifier
+
+
+    def toDict(self):
+        return {
+            'type': self.type,
+            'identifier': self.identifier
+        }
+
+
+class LocalVariableRecord():
+
+    __slots__ = ('name', 'line', 'column')
+
+    def __init__(self, name, line, column):
+        self.name = name
+        self.line = line
+        self.column = column
+
+
+    def toDict(self):
+        return {
+            'variableName': self.name,
+            'Line': self.line,
+            'Column': self.column
+        }
+
+
+class FunctionCallRecord():
+
+    __slots__ = ('name', 'line', 'column')
+
+    def __init__(self, name, line, column):
+        self.name = name
+        self.line = line
+        self.column = column
+
+
+    def toDict(self):
+        return {
+            'functionCallName': self.name,
+            'line': self.line,
+            'column': self.column
+        }
+
+
+class FunctionRecord():
+
+    __slots__ = ('name', 'body', 'bodySpan', 'startLine', 'endLine',
+                 'paramList', 'localVariableList', 'functionCallList')
+
+    # the record of a method is created when the method is entered, endLine stays None until it is exited
+    def __init__(self, startLine):
+        self.name = None
+        self.body = None
+        self.bodySpan = None
+        self.startLine = startLine
+        self.endLine = None
+        self.paramList = []
+        self.localVariableList = []
+        self.functionCallList = []
+
+
+    def toDict(self):
+        return {
+            'functionName': self.name,
+            'functionBody': self.body,
+            'functionStartLine': self.startLine,
+            'functionEndLine': self.endLine,
+            'functionParams': [param.toDict() for param in self.paramList],
+            'localVariableList': [variable.toDict() for variable in self.localVariableList],
+            'functionCallList': [functionCall.toDict() for functionCall in self.functionCallList]
+        }
@@ -1,12 +1,44 @@
 from .JavaParserListener import JavaParserListener
 from .JavaParser import JavaParser
+from .ExtractRecord import FunctionCallRecord, FunctionRecord, LocalVariableRecord, ParamRecord
 from antlr4 import *
 
 class JavaExtract(JavaParserListener):
 
-    def __init__(self):
+    # children the exit handlers read, per context; the others can be dropped once they are exited
+    # when the extractor listens to the parser, None keeps the whole subtree
+    navigationTable = {
+        JavaParser.PackageDeclarationContext: [JavaParser.QualifiedNameContext],
+        JavaParser.ImportDeclarationContext: [JavaParser.QualifiedNameContext],
+        JavaParser.ClassDeclarationContext: [JavaParser.IdentifierContext],
+        JavaParser.CatchTypeContext: [JavaParser.QualifiedNameContext],
+        JavaParser.MethodDeclarationContext: [JavaParser.IdentifierContext, JavaParser.FormalParametersContext,
+                                              JavaParser.QualifiedNameListContext],
+        JavaParser.InterfaceCommonBodyDeclarationContext: [JavaParser.QualifiedNameListContext],
+        JavaParser.ConstructorDeclarationContext: [JavaParser.QualifiedNameListContext],
+        JavaParser.FieldDeclarationContext: [JavaParser.VariableDeclaratorsContext],
+        JavaParser.LocalVariableDeclarationContext: [JavaParser.VariableDeclaratorsContext],
+        JavaParser.MethodCallContext: [JavaParser.IdentifierContext]
+    }
+
+    # bodyMode 'span' : a method record keeps the token indexes of the method in bodySpan,
+    #                   its text is built on demand by TokenTable.spanText
+    # bodyMode 'text' : body also holds ctx.getText() of the method
+    def __init__(self, bodyMode='span'):
         super().__init__()
+        if bodyMode not in ('span', 'text'):
+            raise ValueError('unknown body mode: {mode}'.format(mode=bodyMode))
 
+        self.bodyMode = bodyMode
+        if bodyMode == 'text':
+            # getText() reads the whole subtree of the method
+            self.navigationTable = dict(self.navigationTable)
+            self.navigationTable[JavaParser.MethodDeclarationContext] = None
+        self.reset()
+
+
+    # state of one file, a listener reused for the next file is reset first
+    def reset(self):
         # function-based
         self.functionNumber = 0
         self.functionList = []
@@ -39,49 +71,105 @@ class JavaExtract(JavaParserListener):
             'Private': 0
         }
 
+        # {ctx: (list, index)} places reserved in the lists by entered contexts
+        self.pendingSlot = dict()
+
+
+    # the methods as the dicts of a verbose export
+    def exportFunctionList(self):
+        return [functionRecord.toDict() for functionRecord in self.functionList]
+
+
+    # Entering a context reserves its place in a list and exiting it fills the place in, once the
+    # children are complete. The lists keep the order of a walk of the tree even when they are
+    # filled as the parser exits rules, see StreamingListener.
+    def reserveSlot(self, ctx, slotList):
+        self.pendingSlot[ctx] = (slotList, len(slotList) if slotList is not None else None)
+
+
+    def fillSlot(self, ctx, itemList):
+        slotList, index = self.pendingSlot.pop(ctx)
+        if slotList is not None:
+            slotList[index:index] = itemList
+
 
     def enterPackageDeclaration(self, ctx: JavaParser.PackageDeclarationContext):
+        self.reserveSlot(ctx, self.packageNameList)
+        return super().enterPackageDeclaration(ctx)
+
+
+    def exitPackageDeclaration(self, ctx: JavaParser.PackageDeclarationContext):
         packageName = ctx.qualifiedName().getText()
-        self.packageNameList.append(packageName)
+        self.fillSlot(ctx, [packageName])
         self.packageNumber += 1
-        return super().enterPackageDeclaration(ctx)
+        return super().exitPackageDeclaration(ctx)
 
 
     def enterImportDeclaration(self, ctx: JavaParser.ImportDeclarationContext):
+        self.reserveSlot(ctx, self.importNameList)
+        return super().enterImportDeclaration(ctx)
+
+
+    def exitImportDeclaration(self, ctx: JavaParser.ImportDeclarationContext):
         importName = ctx.qualifiedName().getText()
-        self.importNameList.append(importName)
+        self.fillSlot(ctx, [importName])
         self.importNumber += 1
-        return super().enterImportDeclaration(ctx)
+        return super().exitImportDeclaration(ctx)
 
 
     def enterClassDeclaration(self, ctx: JavaParser.ClassDeclarationContext):
-        self.classNameList.append(ctx.identifier().getText())
-        self.classNumber += 1
+        self.reserveSlot(ctx, self.classNameList)
         return super().enterClassDeclaration(ctx)
 
 
+    def exitClassDeclaration(self, ctx: JavaParser.ClassDeclarationContext):
+        self.fillSlot(ctx, [ctx.identifier().getText()])
+        self.classNumber += 1
+        return super().exitClassDeclaration(ctx)
+
+
     def enterCatchType(self, ctx: JavaParser.CatchTypeContext):
+        self.reserveSlot(ctx, self.exceptionNameList)
+        return super().enterCatchType(ctx)
+
+
+    def exitCatchType(self, ctx: JavaParser.CatchTypeContext):
+        exceptionNameList = []
         exceptionList = ctx.qualifiedName()
         for exception in exceptionList:
             exceptionName = exception.getText()
-            self.exceptionNameList.append(exceptionName)
+            exceptionNameList.append(exceptionName)
             self.exceptionNumber += 1
-        return super().enterCatchType(ctx)
+        self.fillSlot(ctx, exceptionNameList)
+        return super().exitCatchType(ctx)
 
 
     def enterMethodDeclaration(self, ctx: JavaParser.MethodDeclarationContext):
+        self.reserveSlot(ctx, self.exceptionNameList)
+
+        # the record is added on entry, local variables and method calls inside go to functionList[-1]
+        # its end line stays None until the method is exited
+        self.functionList.append(FunctionRecord(ctx.start.line))
+        self.functionNumber += 1
+        ctx.functionRecord = self.functionList[-1]
+        return super().enterMethodDeclaration(ctx)
+
+
+    def exitMethodDeclaration(self, ctx: JavaParser.MethodDeclarationContext):
         # capture exception name and number
+        exceptionNameList = []
         if ctx.THROWS() != None:
             qualifiedList = ctx.qualifiedNameList().qualifiedName()
             for qualified in qualifiedList:
                 exceptionName = qualified.getText()
-            self.exceptionNameList.append(exceptionName)
+            exceptionNameList.append(exceptionName)
             self.exceptionNumber += 1
+        self.fillSlot(ctx, exceptionNameList)
 
         # capture function information
         functionName = ctx.identifier().getText()
-        functionBody = ctx.getText()
-        functionStartLine = ctx.start.line
+        functionBodySpan = (ctx.start.tokenIndex, ctx.stop.tokenIndex)
+        functionBody = ctx.getText() if self.bodyMode == 'text' else None
         functionEndLine = ctx.stop.line
 
         # capture params
@@ -93,122 +181,133 @@ class JavaExtract(JavaParserListener):
             identifiers = params.identifier().getText()
             if isinstance(identifiers, list):
                 for identifier in identifiers:
-                    functionParams.append({
-                        'type': typeName,
-                        'identifier': identifier
-                    })
+                    functionParams.append(ParamRecord(typeName, identifier))
             else:
-                functionParams.append({
-                    'type': typeName,
-                    'identifier': identifiers
-                })
+                functionParams.append(ParamRecord(typeName, identifiers))
 
         # capture params   --- formal parameter
         if ctx.formalParameters().formalParameterList():
             params = ctx.formalParameters().formalParameterList()
             if params.lastFormalParameter():
                 lastParam = params.lastFormalParameter()
-                functionParams.append({
-                    'type': lastParam.typeType().getText(),
-                    'identifier': lastParam.variableDeclaratorId().getText()
-                })
+                functionParams.append(ParamRecord(lastParam.typeType().getText(),
+                                                  lastParam.variableDeclaratorId().getText()))
             if params.formalParameter():
                 formalParams = params.formalParameter()
                 if isinstance(formalParams, list):
                     for formalParam in formalParams:
-                        functionParams.append({
-                            'type': formalParam.typeType().getText(),
-                            'identifier': formalParam.variableDeclaratorId().getText()
-                        })
+                        functionParams.append(ParamRecord(formalParam.typeType().getText(),
+                                                          formalParam.variableDeclaratorId().getText()))
                 else:
-                    functionParams.append({
-                        'type': formalParams.typeType().getText(),
-                        'identifier': formalParams.variableDeclaratorId().getText()
-                    })
+                    functionParams.append(ParamRecord(formalParams.typeType().getText(),
+                                                      formalParams.variableDeclaratorId().getText()))
 
         # summarize unction information
-        self.functionList.append(
-            {
-                'functionName': functionName,
-                'functionBody': functionBody,
-                'functionStartLine': functionStartLine,
-                'functionEndLine': functionEndLine,
-                'functionParams': functionParams,
-                'localVariableList': [],
-                'functionCallList': []
-            }
-        )
-        self.functionNumber += 1
-        return super().enterMethodDeclaration(ctx)
+        functionRecord = ctx.functionRecord
+        functionRecord.name = functionName
+        functionRecord.body = functionBody
+        functionRecord.bodySpan = functionBodySpan
+        functionRecord.endLine = functionEndLine
+        functionRecord.paramList = functionParams
+        return super().exitMethodDeclaration(ctx)
 
 
     def enterInterfaceCommonBodyDeclaration(self, ctx: JavaParser.InterfaceCommonBodyDeclarationContext):
+        self.reserveSlot(ctx, self.exceptionNameList)
+        return super().enterInterfaceCommonBodyDeclaration(ctx)
+
+
+    def exitInterfaceCommonBodyDeclaration(self, ctx: JavaParser.InterfaceCommonBodyDeclarationContext):
+        exceptionNameList = []
         if ctx.THROWS() != None:
             qualifiedList = ctx.qualifiedNameList().qualifiedName()
             for qualified in qualifiedList:
                 exceptionName = qualified.getText()
-                self.exceptionNameList.append(exceptionName)
+                exceptionNameList.append(exceptionName)
                 self.exceptionNumber += 1
-        return super().enterInterfaceCommonBodyDeclaration(ctx)
+        self.fillSlot(ctx, exceptionNameList)
+        return super().exitInterfaceCommonBodyDeclaration(ctx)
 
 
     def enterConstructorDeclaration(self, ctx: JavaParser.ConstructorDeclarationContext):
+        self.reserveSlot(ctx, self.exceptionNameList)
+        return super().enterConstructorDeclaration(ctx)
+
+
+    def exitConstructorDeclaration(self, ctx: JavaParser.ConstructorDeclarationContext):
+        exceptionNameList = []
         if ctx.THROWS() != None:
             qualifiedList = ctx.qualifiedNameList().qualifiedName()
             for qualified in qualifiedList:
                 exceptionName = qualified.getText()
-                self.exceptionNameList.append(exceptionName)
+                exceptionNameList.append(exceptionName)
                 self.exceptionNumber += 1
-        return super().enterConstructorDeclaration(ctx)
+        self.fillSlot(ctx, exceptionNameList)
+        return super().exitConstructorDeclaration(ctx)
 
 
     def enterFieldDeclaration(self, ctx: JavaParser.FieldDeclarationContext):
+        self.reserveSlot(ctx, self.classVariableNameList)
+        return super().enterFieldDeclaration(ctx)
+
+
+    def exitFieldDeclaration(self, ctx: JavaParser.FieldDeclarationContext):
+        variableNameList = []
         contextList = ctx.variableDeclarators().variableDeclarator()
         for context in contextList:
             variableName = context.variableDeclaratorId().getText()
-            self.classVariableNameList.append(variableName)
+            variableNameList.append(variableName)
             self.classVariableNumber += 1
-        return super().enterFieldDeclaration(ctx)
+        self.fillSlot(ctx, variableNameList)
+        return super().exitFieldDeclaration(ctx)
 
 
     def enterLocalVariableDeclaration(self, ctx: JavaParser.LocalVariableDeclarationContext):
+        # bug: unhandle "static {int a = 4;}"
+        if len(self.functionList) == 0:
+            self.reserveSlot(ctx, None)
+        else:
+            self.reserveSlot(ctx, self.functionList[-1].localVariableList)
+        return super().enterLocalVariableDeclaration(ctx)
+
+
+    def exitLocalVariableDeclaration(self, ctx: JavaParser.LocalVariableDeclarationContext):
+        localVariableList = []
         variableList = ctx.variableDeclarators().variableDeclarator()
         for variable in variableList:
             variableName = variable.variableDeclaratorId().getText()
             variableLine = variable.start.line
             variableColumn = variable.start.column
-            
-            # bug: unhandle "static {int a = 4;}"
-            if len(self.functionList) == 0:
-                break
-            
-            self.functionList[-1]['localVariableList'].append(
-                {
-                    'variableName': variableName,
-                    'Line': variableLine,
-                    'Column': variableColumn
-                }
-            )
-        return super().enterLocalVariableDeclaration(ctx)
+
+            localVariableList.append(LocalVariableRecord(variableName, variableLine, variableColumn))
+        self.fillSlot(ctx, localVariableList)
+        return super().exitLocalVariableDeclaration(ctx)
 
 
     def enterMethodCall(self, ctx: JavaParser.MethodCallContext):
+        if len(self.functionList) != 0:
+            ctx.functionRecord = self.functionList[-1]
+            self.reserveSlot(ctx, ctx.functionRecord.functionCallList)
+        else:
+            ctx.functionRecord = None
+        return super().enterMethodCall(ctx)
+
+
+    def exitMethodCall(self, ctx: JavaParser.MethodCallContext):
         if ctx.identifier():
             functionCallName = ctx.identifier().getText()
         functionCallLine = ctx.start.line
         functionCallColumn = ctx.start.column
 
-        if len(self.functionList) != 0 :
-            if functionCallLine >= self.functionList[-1]['functionStartLine'] \
-                and functionCallLine <= self.functionList[-1]['functionEndLine']:
-                self.functionList[-1]['functionCallList'].append(
-                    {
-                        'functionCallName': functionCallName,
-                        'line': functionCallLine,
-                        'column': functionCallColumn
-                    }
-                )
-        return super().enterMethodCall(ctx)
+        functionRecord = ctx.functionRecord
+        if functionRecord is not None:
+            # a method not exited yet encloses the call
+            if functionCallLine >= functionRecord.startLine \
+                and (functionRecord.endLine is None or functionCallLine <= functionRecord.endLine):
+                self.fillSlot(ctx, [FunctionCallRecord(functionCallName, functionCallLine, functionCallColumn)])
+            else:
+                self.fillSlot(ctx, [])
+        return super().exitMethodCall(ctx)
 
 
     def enterLambdaExpression(self, ctx: JavaParser.LambdaExpressionContext):
@@ -216,14 +315,14 @@ class JavaExtract(JavaParserListener):
         return super().enterLambdaExpression(ctx)
 
 
-    def enterExpression(self, ctx: JavaParser.ExpressionContext):
+    def exitExpression(self, ctx: JavaParser.ExpressionContext):
         # ternary operator  ->  ? :
         if ctx.bop and ctx.bop.text == '?':
             self.ternaryOperatorNumber += 1
-        return super().enterExpression(ctx)
+        return super().exitExpression(ctx)
 
 
-    def enterStatement(self, ctx: JavaParser.StatementContext):
+    def exitStatement(self, ctx: JavaParser.StatementContext):
         if ctx.IF():
             self.controlStructureNumber += 1
         elif ctx.ELSE():
@@ -236,7 +335,7 @@ class JavaExtract(JavaParserListener):
             self.controlStructureNumber += 1
         elif ctx.SWITCH():
             self.controlStructureNumber += 1
-        return super().enterStatement(ctx)
+        return super().exitStatement(ctx)
 
     
     def enterLiteral(self, ctx: JavaParser.LiteralContext):
@@ -244,7 +343,7 @@ class JavaExtract(JavaParserListener):
         return super().enterLiteral(ctx)
 
     
-    def enterClassOrInterfaceModifier(self, ctx: JavaParser.ClassOrInterfaceModifierContext):
+    def exitClassOrInterfaceModifier(self, ctx: JavaParser.ClassOrInterfaceModifierContext):
         if ctx.PUBLIC():
             self.accessControlCount['Public'] += 1
         elif ctx.PROTECTED():
@@ -253,4 +352,4 @@ class JavaExtract(JavaParserListener):
             self.accessControlCount['Private'] += 1
         else:
             self.accessControlCount['Default'] += 1
-        return super().enterClassOrInterfaceModifier(ctx)
\ No newline at end of file
+        return super().exitClassOrInterfaceModifier(ctx)
\ No newline at end of file
@@ -1,3 +1,4 @@
 from .JavaParser import JavaParser
 from .JavaLexer import JavaLexer
-from .JavaExtract import JavaExtract
\ No newline at end of file
+from .JavaExtract import JavaExtract
+from .ExtractRecord import FunctionCallRecord, FunctionRecord, LocalVariableRecord, ParamRecord
\ No newline at end of file
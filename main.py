@@ -1,11 +1,14 @@
 import os
 import logging
+import multiprocessing
 
-from feature import PersonParser
+from feature import DFACache, ExclusionRule, ExtractCache, MetadataCache, PersonParser, SourceLoader, TokenCache
 
 logging.basicConfig(filename='parse.log', level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+workerPersonParser = None
+
 
 def extractAllPersonPath(projectPath):
     personPathList= []
@@ -16,16 +19,117 @@ def extractAllPersonPath(projectPath):
     return personPathList
 
 
-def extractAllPersonFeature():
+# cache          : keep the token tables and listener summaries of every file, they hold the text of the
+#                  whole corpus and let a later rescore skip the lexer and the parser
+# commitInterval : writes of a cache committed together, workers sharing the cache files commit every write
+def createPersonParser(outDir, cache=False, commitInterval=1000):
+    # encoding metadata is kept next to the output directory between runs
+    metadataCachePath = os.path.normpath(outDir) + '.metadata.sqlite'
+    metadataCache = MetadataCache(metadataCachePath, commitInterval=commitInterval)
+    fileParserOption = {'listenMode': 'parse'}
+    if cache:
+        # token tables of unchanged sources are reused instead of running the lexer again
+        fileParserOption['tokenCache'] = TokenCache(os.path.normpath(outDir) + '.token.sqlite', commitInterval)
+        # so are the listener summaries instead of running the parser again
+        fileParserOption['extractCache'] = ExtractCache(os.path.normpath(outDir) + '.extract.sqlite',
+                                                        commitInterval)
+    # files matching the path patterns of the ignore file are skipped when it exists
+    ignoreFilePath = '.featureignore'
+    exclusionRule = ExclusionRule(ignoreFilePath=ignoreFilePath) if os.path.exists(ignoreFilePath) else None
+    return PersonParser(SourceLoader(metadataCache=metadataCache), exclusionRule=exclusionRule,
+                        fileParserOption=fileParserOption)
+
+
+def closePersonParser(personParser):
+    personParser.loader.metadataCache.close()
+    for option in ('tokenCache', 'extractCache'):
+        if option in personParser.fileParserOption:
+            personParser.fileParserOption[option].close()
+
+
+# pick the first files of every person to warm up the ANTLR DFA
+def extractWarmUpFilePath(personParser, personPathList, warmUpFileNumber):
+    warmUpFilePath = []
+    filePerPerson = max(1, warmUpFileNumber // max(1, len(personPathList)))
+    for personPath in personPathList:
+        if not os.path.isdir(personPath):
+            continue
+        for index, (filePath, _, _) in enumerate(personParser.iterJavaFile(personPath)):
+            if index >= filePerPerson:
+                break
+            warmUpFilePath.append(filePath)
+        if len(warmUpFilePath) >= warmUpFileNumber:
+            break
+
+    return warmUpFilePath[:warmUpFileNumber]
+
+
+def initWorker(outDir, cache):
+    # each worker opens its own sqlite connection, the warmed DFA is inherited from the parent
+    # a write transaction left open would lock the other workers out of the shared files
+    global workerPersonParser
+    workerPersonParser = createPersonParser(outDir, cache, commitInterval=1)
+
+
+def extractPersonFeature(personPath, outDir, rescore):
+    workerPersonParser.outputPersonFeatureToJson(personPath, outDir, overwrite=rescore)
+    return os.getpid(), personPath, workerPersonParser.statistics()
+
+
+def logStatistics(statistics):
+    for name, value in statistics.items():
+        logging.info('{name} {value}'.format(name=name, value=value))
+
+
+def mergeStatistics(statisticsList):
+    merged = dict()
+    for statistics in statisticsList:
+        for name, value in statistics.items():
+            mergedValue = merged.setdefault(name, dict())
+            for key, number in value.items():
+                mergedValue[key] = mergedValue.get(key, 0) + number
+    return merged
+
+
+# workerNumber : persons are parsed by forked workers when workerNumber > 1
+# rescore      : recompute the existing reports, cached files are neither lexed nor parsed
+# cache        : keep the token and summary caches, they are always used to rescore
+def extractAllPersonFeature(projectPath='dataset/Java/java40/', outDir='report/', workerNumber=1, rescore=False,
+                            cache=False):
     logging.info('----------Start')
-    projectPath = 'dataset/Java/java40/'
-    outDir = 'report/'
-    personParser = PersonParser()
+    cache = cache or rescore
+    # warmed ANTLR DFA state is restored from and saved next to the output directory
+    dfaCache = DFACache(os.path.normpath(outDir) + '.dfa.pickle')
+    warmUpFileNumber = 200
 
     personPathList = extractAllPersonPath(projectPath)
-    for personPath in personPathList:
-        personParser.outputPersonFeatureToJson(personPath, outDir)
-        logging.info('{personPath} is Finished'.format(personPath=personPath))
+    if dfaCache.load():
+        logging.info('DFA restored from {cachePath}'.format(cachePath=dfaCache.cachePath))
+    elif workerNumber > 1:
+        warmUpPersonParser = createPersonParser(outDir)
+        warmUpFilePath = extractWarmUpFilePath(warmUpPersonParser, personPathList, warmUpFileNumber)
+        # no connection of the parent is left open across the fork
+        closePersonParser(warmUpPersonParser)
+        logging.info('DFA warmed up on {number} files'.format(number=dfaCache.warmUp(warmUpFilePath)))
+        dfaCache.save()
+
+    if workerNumber > 1:
+        workerStatistics = dict()
+        with multiprocessing.get_context('fork').Pool(workerNumber, initWorker, (outDir, cache)) as pool:
+            taskList = [(personPath, outDir, rescore) for personPath in personPathList]
+            for pid, personPath, statistics in pool.starmap(extractPersonFeature, taskList, chunksize=1):
+                workerStatistics[pid] = statistics
+                logging.info('{personPath} is Finished'.format(personPath=personPath))
+        logStatistics(mergeStatistics(workerStatistics.values()))
+    else:
+        personParser = createPersonParser(outDir, cache)
+        for personPath in personPathList:
+            personParser.outputPersonFeatureToJson(personPath, outDir, overwrite=rescore)
+            logging.info('{personPath} is Finished'.format(personPath=personPath))
+
+        closePersonParser(personParser)
+        dfaCache.save()
+        logStatistics(personParser.statistics())
 
     logging.info('----------End')
 
@@ -0,0 +1,70 @@
+from feature import ExclusionRule
+
+
+protocSource = b'''// Generated by the protocol buffer compiler.  DO NOT EDIT!
+// source: person.proto
+
+package tutorial;
+
+public final class PersonProto {}
+'''
+
+javadocSource = b'''/*
+ * Copyright 2020 The Authors
+ */
+package shape;
+
+/**
+ * @generated
+ */
+public class Shape {}
+'''
+
+headerTagSource = b'''\xef\xbb\xbf/**
+ * Shape accessors.
+ * @generated by the model tool
+ */
+package shape;
+'''
+
+# markers in code, in comments after the first code or inside a sentence are not generator headers
+handWrittenSourceList = [
+    b'''package shape;
+
+/** id generated by the database sequence */
+public class Record { long id; }
+''',
+    b'''package shape;
+
+public class Seed { String key = "Key generated from seed"; }
+''',
+    b'''/*
+ * Licence text. Do not edit this header.
+ */
+package shape;
+
+public class Licence {}
+''',
+    b'''package shape;
+
+// DO NOT EDIT
+public class Late {}
+''',
+]
+
+
+def test_generated_markers_are_off_by_default():
+    exclusionRule = ExclusionRule()
+    assert not exclusionRule.excludeContent(protocSource)
+    assert exclusionRule.skipCount['GeneratedHeader'] == 0
+
+
+def test_generated_markers_match_the_leading_comment_lines():
+    exclusionRule = ExclusionRule(generatedMarkerList=ExclusionRule.defaultGeneratedMarkerList)
+    assert exclusionRule.excludeContent(protocSource)
+    assert exclusionRule.excludeContent(headerTagSource)
+    # the javadoc of the class follows the package declaration
+    assert not exclusionRule.excludeContent(javadocSource)
+    for data in handWrittenSourceList:
+        assert not exclusionRule.excludeContent(data)
+    assert exclusionRule.skipCount['GeneratedHeader'] == 2
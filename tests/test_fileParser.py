@@ -0,0 +1,288 @@
+import re
+import json
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from feature import FileParser, LineScanner, ParseBudget, ParserSession, TokenTable
+from feature.SourceLoader import SourceFile
+from feature.TextScanner import TextScanner, usageRuleTable, usageRuleScanner, stringOutputRuleTable, \
+    stringOutputRuleScanner
+
+
+shapeSource = b'''package shape;
+
+import java.util.List;
+
+public class Shape {
+
+    private int side = 3;
+
+    // area of the shape
+    public int area(int scale) {
+        int result = side * side * scale;
+        System.out.println("area " + result);
+        return result;
+    }
+
+    public int perimeter(List<Integer> sideList) {
+        int total = 0;
+        for (int value : sideList) {
+            total += value;
+        }
+        return total;
+    }
+}
+'''
+
+brokenSource = b'''public class Broken {
+
+    void first( {
+        int x = ;
+    }
+
+    int second(int y) { return y + 1; }
+}
+'''
+
+methodSource = b'''
+    public int method{index}(int value) {{
+        int local{index} = value * {index};
+        helper(local{index});
+        return local{index};
+    }}
+'''
+
+bigSource = b'public class Big {\n' + b''.join(methodSource.replace(b'{index}', str(index).encode())
+                                              .replace(b'{{', b'{').replace(b'}}', b'}')
+                                              for index in range(40)) + b'}\n'
+
+recordSource = b'''public record Point(int x, int y) {
+
+    public Point scale(int factor) {
+        if (factor < 0) throw new IllegalArgumentException("factor");
+        return new Point(x * factor, y * factor);
+    }
+
+    static Point origin() { return new Point(0, 0); }
+}
+'''
+
+# the files after the parse error and the over budget file show any state left behind by them
+sourceList = [
+    ('Shape.java', shapeSource),
+    ('Broken.java', brokenSource),
+    ('Point.java', recordSource),
+    ('Big.java', bigSource),
+    ('Shape2.java', shapeSource),
+    ('Broken2.java', brokenSource),
+    ('Big2.java', bigSource),
+    ('Point2.java', recordSource),
+]
+
+
+def parseAll(createFileParser, reuse):
+    fileParser = createFileParser()
+    featureList = []
+    for fileName, data in sourceList:
+        if not reuse:
+            fileParser = createFileParser()
+        featureList.append(fileParser.parseBytes(fileName, data))
+    return json.dumps(featureList, indent=4)
+
+
+@pytest.mark.parametrize('option', [
+    {},
+    {'predictionMode': 'LL'},
+    {'listenMode': 'parse'},
+    {'verbose': True},
+    {'verbose': True, 'listenMode': 'parse'},
+    {'verbose': True, 'bodyMode': 'text'},
+    {'verbose': True, 'bodyMode': 'text', 'listenMode': 'parse'},
+    {'parseBudget': ParseBudget(maxTokenNumber=400)},
+    {'parseBudget': ParseBudget(maxTokenNumber=400, action='skip'), 'verbose': True},
+    {'parseBudget': ParseBudget(maxTokenNumber=400), 'listenMode': 'parse', 'verbose': True},
+    # every parse is abandoned at its deadline, part way through the file
+    {'parseBudget': ParseBudget(maxParseSeconds=0), 'verbose': True},
+])
+def test_reused_parser_matches_fresh_parsers(option):
+    createFileParser = lambda: FileParser(**option)
+    assert parseAll(createFileParser, True) == parseAll(createFileParser, False)
+
+
+def test_sequence_covers_error_and_budget():
+    fileParser = FileParser(parseBudget=ParseBudget(maxTokenNumber=400))
+    featureList = [fileParser.parseBytes(fileName, data) for fileName, data in sourceList]
+    assert [features.get('ParseMode', 'full') for features in featureList] == \
+        ['full', 'full', 'full', 'lexical', 'full', 'full', 'lexical', 'full']
+    assert fileParser.parseStatistics['LLFallback'] == 2
+    assert fileParser.parseStatistics['OverBudget'] == 2
+
+
+def test_method_body_modes():
+    data = b'class A {\n\n    int area(int y) { return y * y }\n\n    int side() { return 1; }\n}\n'
+    spanList = FileParser(verbose=True).parseBytes('A.java', data)['FunctionList']
+    textList = FileParser(verbose=True, bodyMode='text').parseBytes('A.java', data)['FunctionList']
+    # getText() holds the token conjured by the error recovery, the token table only the tokens of the file
+    assert [function['functionBody'] for function in spanList] == \
+        ['intarea(inty){returny*y}', 'intside(){return1;}']
+    assert [function['functionBody'] for function in textList] == \
+        ["intarea(inty){returny*y<missing ';'>}", 'intside(){return1;}']
+
+
+# texts where the vectorised scanners could part from the loops they replace
+edgeTextList = [
+    '', '\n', '\n\n', 'a', ' ', '\t', 'unterminated last line', 'a\nb', 'a\n\n  \nb\n  ',
+    'crlf\r\nline\r\n', 'cr\rline\r', '\r\n\r\n', 'mixed\r\n\n\rend',
+    'unicode　space\xa0and line end\n', '　\n\x1c\n\x1d\x1e\x1f\n', 'a\x1cb\x0bc\x0cd\n',
+    '\\tliteral tab\n\\tx\n y\n', '\tindent\n\tx\n    y\n', ' \t mixed \t \n\t \n',
+    'text.strip().stripLeading().stripTrailing()\n', 'a = """\ntext block\n""";\n', '""""""\n',
+    '@A\n@B\n', '@A\n@B\n@C\n@D\n', '@A\n@B', '@Ä\n@B\n', '@A　\n@B\n',
+    'var variable = x -> x.stream(); // ->\n', 'public final private finally synchronized volatile\n',
+    'log.error("a"); err("b"); info("c")\nSystem.out.println("d");System.out.print("e")\n',
+    'System.err.println("x");System.out.printf("%d")\n', 'éé́ accent\n\n',
+]
+
+
+# the per-line loops LineScanner replaced
+def loopWordTermFrequencyAndCountOfLine(fileData):
+    word = []
+    wordCountOfLine = []
+    for line in fileData:
+        wordOfLine = re.split(r'\s+', line)
+        word.extend(wordOfLine)
+        wordCountOfLine.append(len(wordOfLine))
+    if len(word) == 0:
+        return None, None
+    wordTotalCount = len(word)
+    wordTermFrequency = {term: frequency / wordTotalCount for term, frequency in Counter(word).items()}
+    return wordTermFrequency, Counter(wordCountOfLine)
+
+
+def loopLineLengthAvgAndStandardDev(fileData):
+    lineLength = [len(line) for line in fileData]
+    return sum(lineLength) / len(lineLength), np.std(lineLength), Counter(lineLength)
+
+
+def loopBlanklineRate(fileData):
+    blankCount = 0
+    bufferCount = 0
+    leadingFlag = False
+    for line in fileData:
+        if re.fullmatch(r'[\s]*', line):
+            if leadingFlag:
+                bufferCount += 1
+        else:
+            blankCount += bufferCount
+            bufferCount = 1
+            leadingFlag = True
+    return math.log(blankCount / len(fileData))
+
+
+def loopWhiteSpacesRate(text):
+    rateList = [len(re.findall(pattern, text)) / len(text) for pattern in ('\t', ' ', '\n')]
+    return tuple(math.log(rate) if rate != 0 else None for rate in rateList)
+
+
+def loopTabOrSpaceIndent(fileData):
+    tabIndent = 0
+    spaceIndent = 0
+    for line in fileData:
+        if line.startswith('\\t'):
+            tabIndent += 1
+        elif line.startswith(' '):
+            spaceIndent += 1
+    return tabIndent > spaceIndent
+
+
+# the result, or the exception type, with the key order of the dicts
+def outcome(function, *argumentList):
+    try:
+        result = function(*argumentList)
+    except Exception as e:
+        return type(e).__name__
+    return json.dumps(result, default=float)
+
+
+@pytest.mark.parametrize('text', edgeTextList)
+def test_line_scanner_matches_the_line_loops(text):
+    source = SourceFile('Edge.java', text.encode('utf-8'), 'utf-8')
+    lineScanner = LineScanner(source.text)
+    fileParser = FileParser()
+    assert outcome(fileParser.calWordTermFrequencyAndCountOfLine, lineScanner) == \
+        outcome(loopWordTermFrequencyAndCountOfLine, source.lines)
+    assert outcome(fileParser.calLineLengthAvgAndStandardDev, lineScanner) == \
+        outcome(loopLineLengthAvgAndStandardDev, source.lines)
+    assert outcome(fileParser.calBlanklineRate, lineScanner) == outcome(loopBlanklineRate, source.lines)
+    assert outcome(fileParser.calWhiteSpacesRate, lineScanner) == outcome(loopWhiteSpacesRate, source.text)
+    assert outcome(fileParser.isTabOrSpaceIndent, lineScanner) == outcome(loopTabOrSpaceIndent, source.lines)
+
+
+@pytest.mark.parametrize('text', edgeTextList)
+def test_rule_scanner_matches_one_findall_per_rule(text):
+    # the usage counts and string outputs were one re.findall pass per rule
+    usageCountList = [sum(len(re.findall(rule, text)) for rule in ruleList) for ruleList in usageRuleTable.values()]
+    assert usageRuleScanner.countCategory(text) == usageCountList
+    stringOutputList = [match for rule in stringOutputRuleTable['StringOutput'] for match in re.findall(rule, text)]
+    assert stringOutputRuleScanner.findAll(text) == stringOutputList
+
+    # the bytes scanner counts the same when TextScanner takes the file
+    source = SourceFile('Edge.java', text.encode('utf-8'), 'utf-8')
+    textScanner = TextScanner.fromSource(source)
+    if textScanner is not None:
+        assert list(textScanner.countUsage()) == \
+            [sum(len(re.findall(rule, source.text)) for rule in ruleList) for ruleList in usageRuleTable.values()]
+
+
+# the loops over the ANTLR tokens the TokenTable columns replaced
+def loopKeywordRate(tokenList, text):
+    tokenRate = sum(1 for token in tokenList if 1 <= token.type <= 66) / len(text)
+    return math.log(tokenRate) if tokenRate != 0 else None
+
+
+def loopASTLeavesAndKeywordTermFrequency(tokenList):
+    ASTLeavesCount = Counter(token.type for token in tokenList)
+    keywordTotalCount = sum(count for index, count in ASTLeavesCount.items() if 1 <= index <= 65)
+    keywordTermFrequency = {index: count / keywordTotalCount for index, count in ASTLeavesCount.items()
+                            if 1 <= index <= 65}
+    ASTLeavesTermFrequency = {index: count / len(tokenList) for index, count in ASTLeavesCount.items()}
+    return keywordTermFrequency, ASTLeavesTermFrequency
+
+
+def loopIndentifierLengthFrequency(tokenList):
+    return Counter(len(token.text) for token in tokenList if token.type == 129)
+
+
+def loopComment(tokenList):
+    return [token.text for token in tokenList if token.channel == 4]
+
+
+tokenSourceList = [shapeSource, brokenSource, bigSource, recordSource, b'', b'// only a comment',
+                   b'/** doc */ class \xc3\x89t\xc3\xa9 { int \xce\xb1\xce\xb2 = 1; }\n',
+                   b'class A {\r\n\tvar x = "\\u00e9"; /* unterminated',
+                   b'@A\n@B\nenum E { ONE, TWO; sealed non-sealed permits record yield }\n']
+
+
+@pytest.mark.parametrize('data', tokenSourceList)
+def test_token_table_matches_the_token_loops(data):
+    source = SourceFile('Edge.java', data, 'utf-8')
+    tokenStream = ParserSession().tokenize(source.inputStream())
+    tokenStream.fill()
+    tokenList = tokenStream.tokens
+    fileParser = FileParser()
+    # the columns built from the tokens and those read back from the token cache
+    tokenTable = TokenTable.fromTokenList(source.text, tokenList)
+    for table in (tokenTable, TokenTable.fromBytes(source.text, tokenTable.toBytes())):
+        assert outcome(fileParser.calKeywordRate, table, source.text) == \
+            outcome(loopKeywordRate, tokenList, source.text)
+        assert outcome(fileParser.calASTLeavesAndKeywordTermFrequency, table) == \
+            outcome(loopASTLeavesAndKeywordTermFrequency, tokenList)
+        assert outcome(fileParser.calIndentifierLengthFrequency, table) == \
+            outcome(loopIndentifierLengthFrequency, tokenList)
+        assert fileParser.extractComment(table) == loopComment(tokenList)
+        assert [(token.type, token.channel, token.start, token.stop, token.line, token.column, token.text)
+                for token in table.createTokenList(source.inputStream())] == \
+            [(token.type, token.channel, token.start, token.stop, token.line, token.column, token.text)
+             for token in tokenList]
@@ -0,0 +1,71 @@
+import os
+import json
+import sqlite3
+import importlib
+
+
+javaSource = '''package person{person};
+
+import java.util.List;
+
+public class Shape{index} {{
+
+    private int side = {index};
+
+    // area of the shape
+    public int area(int scale) {{
+        int result = side * side * scale;
+        System.out.println("area " + result);
+        return result;
+    }}
+
+    public int perimeter(List<Integer> sideList) {{
+        int total = 0;
+        for (int value : sideList) {{
+            total += value;
+        }}
+        return total;
+    }}
+}}
+'''
+
+
+def writeProject(projectPath, personNumber=6, fileNumber=5):
+    for person in range(personNumber):
+        personPath = os.path.join(projectPath, 'person{person}'.format(person=person))
+        os.makedirs(personPath)
+        for index in range(fileNumber):
+            with open(os.path.join(personPath, 'Shape{index}.java'.format(index=index)), 'w') as fp:
+                fp.write(javaSource.format(person=person, index=person * fileNumber + index))
+
+
+def readReport(outDir):
+    return {fileName: json.load(open(os.path.join(outDir, fileName))) for fileName in sorted(os.listdir(outDir))}
+
+
+def test_workers_share_the_caches(tmp_path, monkeypatch):
+    # main logs to parse.log in the working directory
+    monkeypatch.chdir(tmp_path)
+    main = importlib.import_module('main')
+    projectPath = str(tmp_path / 'project')
+    writeProject(projectPath)
+
+    singleOutDir = str(tmp_path / 'single') + '/'
+    os.makedirs(singleOutDir)
+    main.extractAllPersonFeature(projectPath, singleOutDir, workerNumber=1)
+
+    # the token and summary caches are only kept when asked for
+    assert not os.path.exists(os.path.normpath(singleOutDir) + '.token.sqlite')
+    assert not os.path.exists(os.path.normpath(singleOutDir) + '.extract.sqlite')
+
+    workerOutDir = str(tmp_path / 'worker') + '/'
+    os.makedirs(workerOutDir)
+    main.extractAllPersonFeature(projectPath, workerOutDir, workerNumber=3, cache=True)
+    assert readReport(workerOutDir) == readReport(singleOutDir)
+
+    # every file is stored once by the workers, the second run reads the summaries back
+    connection = sqlite3.connect(os.path.normpath(workerOutDir) + '.extract.sqlite')
+    assert connection.execute('SELECT COUNT(*) FROM extract').fetchone()[0] == 30
+    connection.close()
+    main.extractAllPersonFeature(projectPath, workerOutDir, workerNumber=3, rescore=True)
+    assert readReport(workerOutDir) == readReport(singleOutDir)